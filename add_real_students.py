@@ -1,9 +1,9 @@
-﻿import sqlite3
-import random
+﻿import random
+from database import connect
 
 print("🎓 Adding Real Student Names & Marks...")
 
-conn = sqlite3.connect('bca_results.db')
+conn = connect()
 cursor = conn.cursor()
 
 # Clear existing data
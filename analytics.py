@@ -0,0 +1,95 @@
+"""Analysis dashboard numbers computed from the running mark histogram.
+
+compute_analytics() reads mark_histogram, the (subject, mark value) counts
+that database triggers keep current on every mark write, and derives the
+overall stats, per-subject stats and grade distribution from it in Python.
+That is at most 101 rows per subject, however many marks there are. The
+/analysis tables and charts are both fed from the returned dict, so they
+always agree and share GRADE_BANDS.
+"""
+from database import GRADE_BANDS, PASS_MARK
+
+def grade_band_labels():
+    """Display labels for each grade band, e.g. 'A+ (80-89)' and 'F (Below 40)'"""
+    labels = []
+    upper = 100
+    for minimum, letter in GRADE_BANDS[:-1]:
+        labels.append((letter, f'{letter} ({minimum}-{upper})'))
+        upper = minimum - 1
+    labels.append((GRADE_BANDS[-1][1], f'{GRADE_BANDS[-1][1]} (Below {GRADE_BANDS[-2][0]})'))
+    return labels
+
+def grade_for_mark(mark):
+    """Grade letter for a single mark or percentage"""
+    for minimum, letter in GRADE_BANDS:
+        if mark >= minimum:
+            return letter
+    return GRADE_BANDS[-1][1]
+
+def compute_analytics(conn):
+    """Overall stats, per-subject stats and grade distribution"""
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT id, subject_code, subject_name FROM subjects ORDER BY subject_code')
+    subjects = {
+        subject_id: {
+            'id': subject_id, 'code': code, 'name': name,
+            'count': 0, 'total': 0, 'highest': None, 'lowest': None, 'passed': 0,
+        }
+        for subject_id, code, name in cursor.fetchall()
+    }
+    grade_counts = {letter: 0 for _, letter in GRADE_BANDS}
+
+    # Histogram of mark values per subject, maintained by the marks triggers
+    cursor.execute('SELECT subject_id, marks, n FROM mark_histogram WHERE n > 0')
+    for subject_id, mark, count in cursor:
+        subject = subjects.get(subject_id)
+        if subject is None:
+            continue
+        subject['count'] += count
+        subject['total'] += mark * count
+        subject['highest'] = mark if subject['highest'] is None else max(subject['highest'], mark)
+        subject['lowest'] = mark if subject['lowest'] is None else min(subject['lowest'], mark)
+        if mark >= PASS_MARK:
+            subject['passed'] += count
+        grade_counts[grade_for_mark(mark)] += count
+
+    return build_analytics(conn, list(subjects.values()), grade_counts)
+
+def build_analytics(conn, subjects, grade_counts):
+    """Assemble the analytics dict from per-subject accumulators and grade counts"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM students')
+    total_students = cursor.fetchone()[0]
+
+    entries = sum(subject['count'] for subject in subjects)
+    for subject in subjects:
+        count = subject['count']
+        subject['average'] = subject['total'] / count if count else 0.0
+        subject['pass_rate'] = subject['passed'] * 100.0 / count if count else 0.0
+
+    graded = [subject for subject in subjects if subject['count']]
+    overall = {
+        'students': total_students,
+        'entries': entries,
+        'average': sum(subject['total'] for subject in subjects) / entries if entries else 0.0,
+        'highest': max((subject['highest'] for subject in graded), default=None),
+        'lowest': min((subject['lowest'] for subject in graded), default=None),
+        'pass_percentage': sum(subject['passed'] for subject in subjects) * 100.0 / entries if entries else 0.0,
+    }
+
+    grades = [
+        {
+            'letter': letter,
+            'label': label,
+            'count': grade_counts[letter],
+            'percentage': grade_counts[letter] * 100.0 / entries if entries else 0.0,
+        }
+        for letter, label in grade_band_labels()
+    ]
+
+    return {
+        'overall': overall,
+        'subjects': subjects,
+        'grades': grades,
+    }
@@ -0,0 +1,187 @@
+"""Benchmarks for the expensive parts of the app.
+
+Usage:
+    python benchmark.py charts [--db bca_results.db] [--renders 48] [--threads 1 2 4 8]
+    python benchmark.py statistics [--db bca_results.db] [--repeat 3]
+    python benchmark.py cards [--db bca_results.db] [--cards 200]
+    python benchmark.py templates [--db bca_results.db] [--rows 10000] [--repeat 5]
+"""
+import argparse
+import html
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DB_PATH, connect
+
+def bench_charts(args):
+    """Chart renders per second by thread count"""
+    from analytics import compute_analytics
+    from charts import RENDERERS, render_chart
+
+    conn = connect(args.db)
+    analytics = compute_analytics(conn)
+    conn.close()
+
+    names = list(RENDERERS)
+    jobs = [names[i % len(names)] for i in range(args.renders)]
+    # Warm-up builds each thread's figure templates and the font cache
+    render_chart(names[0], analytics)
+
+    print(f"📊 Rendering {args.renders} charts ({', '.join(names)})")
+    for threads in args.threads:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            sizes = list(executor.map(lambda name: len(render_chart(name, analytics)), jobs))
+        elapsed = time.perf_counter() - started
+        print(f"   • {threads:>2} thread(s): {elapsed:.2f}s, {len(sizes) / elapsed:.1f} renders/sec")
+
+def bench_statistics(args):
+    """Load and compute times of the NumPy statistics module"""
+    from mark_statistics import compute_statistics
+
+    conn = connect(args.db)
+    print(f"📐 Computing distribution statistics on {args.db}")
+    for run in range(1, args.repeat + 1):
+        started = time.perf_counter()
+        statistics = compute_statistics(conn)
+        elapsed = time.perf_counter() - started
+        timings = statistics['timings']
+        print(f"   • run {run}: {statistics['marks']:,} marks, {statistics['students']:,} students - "
+              f"load {timings['load_seconds']:.2f}s, compute {timings['compute_seconds']:.2f}s, "
+              f"total {elapsed:.2f}s")
+    conn.close()
+
+def bench_cards(args):
+    """Result card renders per second for each renderer"""
+    from result_cards import RENDERERS, fetch_card
+
+    conn = connect(args.db)
+    student_ids = [row[0] for row in conn.execute(
+        'SELECT student_id FROM student_results ORDER BY student_id LIMIT 20')]
+    cards = [fetch_card(conn, student_id) for student_id in student_ids]
+    conn.close()
+    if not cards:
+        print("❌ No students with marks to render")
+        return
+
+    print(f"🧾 Rendering {args.cards} result cards per renderer (single process)")
+    baseline = None
+    for name, render in RENDERERS.items():
+        render(cards[0])  # warm-up: font metrics and the first stylesheet
+        started = time.perf_counter()
+        size = sum(len(render(cards[i % len(cards)])) for i in range(args.cards))
+        rate = args.cards / (time.perf_counter() - started)
+        baseline = baseline or rate
+        print(f"   • {name:<9} {rate:7.1f} cards/sec, {size / args.cards / 1024:.1f} KB/card, "
+              f"{rate / baseline:.1f}x")
+
+def render_students_fstring(students):
+    """The students page as app.py used to build it: f-strings and += in a loop (escaped like Jinja)"""
+    student_rows = ""
+    for student in students:
+        student_rows += f"""
+        <tr>
+            <td>{student['id']}</td>
+            <td>{html.escape(student['roll_no'])}</td>
+            <td>{html.escape(student['name'])}</td>
+            <td>{student['semester']}</td>
+            <td>
+                <a href='/view_result/{student['id']}' style='color: #2196F3; margin-right: 10px;'>👁️ View Result</a>
+                <a href='/download_pdf/{student['id']}' style='color: #e74c3c;'>📄 Download PDF</a>
+            </td>
+        </tr>
+        """
+    return f'''<!DOCTYPE html>
+<html>
+<head><title>Students List</title></head>
+<body>
+    <p><strong>Total Students:</strong> {len(students)}</p>
+    <table>
+        <tr><th>ID</th><th>Roll No</th><th>Name</th><th>Semester</th><th>Actions</th></tr>
+        {student_rows}
+    </table>
+</body>
+</html>'''
+
+def bench_templates(args):
+    """Students page render time: f-string concatenation against the compiled Jinja template"""
+    from jinja2 import Environment, FileSystemLoader
+    from student_list import iter_students
+
+    conn = connect(args.db)
+    students = list(itertools.islice(iter_students(conn), args.rows))
+    conn.close()
+    # The whole list on one page, as /students?all=1 shows it
+    context = {'students': students, 'total': len(students), 'show_all': True, 'sort': 'name',
+               'semester': None, 'semesters': [], 'filters': 'sort=name', 'after': '', 'next_page': None}
+
+    # Configured as app.py configures Flask's environment
+    env = Environment(loader=FileSystemLoader('templates'), autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    started = time.perf_counter()
+    template = env.get_template('students.html')
+    compile_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    env.get_template('students.html')
+    cached_ms = (time.perf_counter() - started) * 1000
+    print(f"🧩 Rendering the students page with {len(students):,} rows ({args.repeat} runs, best of)")
+    print(f"   • compile students.html: {compile_ms:.1f} ms once, {cached_ms:.3f} ms from the cache")
+
+    def best(render):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            size, first = render(started)
+            timings.append((time.perf_counter() - started, first, size))
+        return min(timings)
+
+    def fstring(started):
+        page = render_students_fstring(students)
+        return len(page), time.perf_counter() - started
+
+    def jinja(started):
+        page = template.render(**context)
+        return len(page), time.perf_counter() - started
+
+    def streamed(started):
+        chunks = template.generate(**context)
+        size = len(next(chunks))
+        first = time.perf_counter() - started
+        return size + sum(len(chunk) for chunk in chunks), first
+
+    baseline = None
+    for name, render in (('f-string', fstring), ('jinja', jinja), ('streamed', streamed)):
+        elapsed, first, size = best(render)
+        baseline = baseline or elapsed
+        print(f"   • {name:<8} {elapsed * 1000:8.1f} ms total, first byte after {first * 1000:7.2f} ms, "
+              f"{size / 1024:,.0f} KB, {baseline / elapsed:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the result management system.')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    charts = commands.add_parser('charts', parents=[common], help='chart renders/sec by thread count')
+    charts.add_argument('--renders', type=int, default=48)
+    charts.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    charts.set_defaults(func=bench_charts)
+
+    statistics = commands.add_parser('statistics', parents=[common], help='NumPy statistics timings')
+    statistics.add_argument('--repeat', type=int, default=3)
+    statistics.set_defaults(func=bench_statistics)
+
+    cards = commands.add_parser('cards', parents=[common], help='result card renders/sec by renderer')
+    cards.add_argument('--cards', type=int, default=200)
+    cards.set_defaults(func=bench_cards)
+
+    templates = commands.add_parser('templates', parents=[common], help='page render time, f-strings vs Jinja')
+    templates.add_argument('--rows', type=int, default=10000)
+    templates.add_argument('--repeat', type=int, default=5)
+    templates.set_defaults(func=bench_templates)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
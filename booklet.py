@@ -0,0 +1,157 @@
+"""One printable PDF with a result card page for every student of a class.
+
+Card data comes from a single query that walks students in roll number
+order through the roll_no index and each student's marks through
+idx_marks_student_subject, so rows arrive already grouped and sorted and
+only one student is held in Python at a time. Class ranks come from a
+RANK() window over student_results inside the same query. Pages are drawn
+with the canvas card renderer: the static frame is defined once as a form
+XObject and every page references it, so a page only carries its own values.
+
+Usage: python booklet.py booklet.pdf [--semester 5]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from database import DB_PATH, connect
+from progress import progress_printer
+from result_cards import (card_key, content_hash, count_subjects, define_card_frame, draw_card_page,
+                          publication_date, record_publications)
+
+# Every student with results and their marks, one row per mark, in booklet order.
+# CROSS JOIN fixes the join order (students by roll_no, subjects by code) so
+# the rows stream without sorting.
+BOOKLET_SQL = '''
+    WITH ranked AS (
+        SELECT student_id, total_marks, percentage, grade, passed,
+               RANK() OVER (ORDER BY percentage DESC) AS rank,
+               COUNT(*) OVER () AS out_of
+        FROM student_results
+    )
+    SELECT st.id, st.roll_no, st.name, st.semester,
+           r.total_marks, r.percentage, r.grade, r.passed, r.rank, r.out_of,
+           p.content_hash, p.published_at,
+           s.subject_code, s.subject_name, m.marks
+    FROM students st
+    CROSS JOIN subjects s
+    CROSS JOIN ranked r
+    CROSS JOIN marks m
+    LEFT JOIN result_publications p ON p.student_id = st.id
+    WHERE r.student_id = st.id AND m.student_id = st.id AND m.subject_id = s.id {where}
+    ORDER BY st.roll_no, s.subject_code
+'''
+
+def count_pages(conn, semester=None):
+    """Number of students (pages) in the booklet"""
+    sql = 'SELECT COUNT(*) FROM students st JOIN student_results r ON r.student_id = st.id'
+    if semester is not None:
+        return conn.execute(sql + ' WHERE st.semester = ?', (semester,)).fetchone()[0]
+    return conn.execute(sql).fetchone()[0]
+
+def iter_booklet_cards(conn, semester=None):
+    """Yield card dicts (as fetch_card() builds them) in roll number order.
+
+    Publication dates are shared with the individual cards: a student whose
+    card content has not changed keeps the date already recorded. New dates
+    are recorded once the query has been read to the end (or abandoned): a
+    write on this connection while its read is still open fails as soon as
+    any other connection has committed since the read began.
+    """
+    where = 'AND st.semester = ?' if semester is not None else ''
+    params = (semester,) if semester is not None else ()
+    subject_total = count_subjects(conn)
+    publications = []
+    rows = conn.execute(BOOKLET_SQL.format(where=where), params)
+    try:
+        yield from _group_cards(rows, subject_total, publications)
+    finally:
+        rows.close()
+        if publications:
+            record_publications(conn, publications)
+
+def _group_cards(rows, subject_total, publications):
+    """Card dicts from BOOKLET_SQL rows; appends the publications to record"""
+    for student_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+        first = next(group)
+        (_, roll_no, name, semester_no, total_marks, percentage, grade, passed,
+         rank, out_of, published_hash, published_at) = first[:12]
+        card = {
+            'student_id': student_id,
+            'roll_no': roll_no,
+            'name': name,
+            'semester': semester_no,
+            'total_marks': total_marks,
+            'percentage': percentage,
+            'grade': grade,
+            'passed': passed,
+            'marks': [list(row[12:]) for row in itertools.chain([first], group)],
+            'subject_total': subject_total,
+            'rank': {'rank': rank, 'out_of': out_of, 'percentage': percentage},
+        }
+        card['content_hash'] = content_hash(card)
+        if card['content_hash'] != published_hash:
+            published_at = publication_date()
+            publications.append((student_id, card['content_hash'], published_at))
+        card['published_at'] = published_at
+        card['key'] = card_key(card)
+        yield card
+
+def write_booklet(conn, path, semester=None, on_progress=None):
+    """Write the booklet to path; returns the page count.
+
+    on_progress(done, total, seconds) is called after every page.
+    """
+    total = count_pages(conn, semester) if on_progress else None
+    started = time.perf_counter()
+    c = canvas.Canvas(path, pagesize=letter)
+    title = f'BCA Semester {semester} Results' if semester is not None else 'BCA Results'
+    c.setTitle(title)
+    c.setAuthor('Alpine College of Education - BCA Department')
+    define_card_frame(c)
+    pages = 0
+    for card in iter_booklet_cards(conn, semester):
+        draw_card_page(c, card)
+        c.showPage()
+        pages += 1
+        if on_progress:
+            on_progress(pages, total, time.perf_counter() - started)
+    c.save()
+    return pages
+
+def booklet_filename(semester=None):
+    """Download name such as bca_results_booklet_sem5.pdf"""
+    suffix = f'_sem{semester}' if semester is not None else ''
+    return f'bca_results_booklet{suffix}.pdf'
+
+print_progress = progress_printer('pages', '📖')
+
+def main():
+    parser = argparse.ArgumentParser(description='Write one PDF with a result card page per student.')
+    parser.add_argument('output', help='PDF file to write')
+    parser.add_argument('--semester', type=int, help='only students of this semester')
+    parser.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    print(f"📚 Writing result booklet {args.output}")
+    started = time.perf_counter()
+    pages = write_booklet(conn, args.output, args.semester, on_progress=print_progress)
+    conn.close()
+    elapsed = time.perf_counter() - started
+    if not pages:
+        os.remove(args.output)
+        print("❌ No students with results match")
+        return 1
+    size = os.path.getsize(args.output)
+    print(f"✅ Wrote {pages} pages ({size / 1024:,.0f} KB) in {elapsed:.2f}s "
+          f"({pages / elapsed:.1f} pages/sec)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
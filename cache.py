@@ -0,0 +1,200 @@
+"""Small caches: in-process LRU, content-addressed files and per-data-version memos."""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by total size in bytes.
+
+    Values are bytes (or anything with len()); the entry that was used least
+    recently is evicted first once max_bytes would be exceeded.
+    """
+
+    def __init__(self, max_bytes, name='cache'):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting old entries to stay within max_bytes"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = value
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Snapshot of size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+class VersionMemo:
+    """The latest value of something derived from the data, kept for one data version.
+
+    get() recomputes only when asked for a version other than the one the
+    kept value belongs to. One caller computes at a time; callers asking for
+    the same version meanwhile wait for that result instead of repeating a
+    slow computation side by side.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def _kept(self, version):
+        with self._lock:
+            return (True, self._value) if self._version == version else (False, None)
+
+    def get(self, version, compute):
+        """compute()'s value for version, computed at most once per version (always for None)"""
+        if version is None:
+            return compute()
+        found, value = self._kept(version)
+        if found:
+            return value
+        with self._compute_lock:
+            # Another caller may have computed it while this one waited
+            found, value = self._kept(version)
+            if found:
+                return value
+            value = compute()
+            with self._lock:
+                self._version = version
+                self._value = value
+        return value
+
+class DiskCache:
+    """Content-addressed file cache: one file per key in a directory.
+
+    Keys are hex digests of the content they stand for, so an entry never
+    goes stale; changed content simply gets a new key. Files are written to
+    a temporary name and renamed into place, so readers (including other
+    processes) never see a partial entry.
+    """
+
+    def __init__(self, directory, name='disk', suffix=''):
+        self.name = name
+        self.directory = directory
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key):
+        """Stored bytes for key, or None"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                value = f.read()
+        except FileNotFoundError:
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key (atomically replacing any existing file)"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+
+    def delete(self, key):
+        """Remove the entry for key, if there is one"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self):
+        """Every key currently stored"""
+        if not os.path.isdir(self.directory):
+            return set()
+        found = set()
+        for bucket in os.scandir(self.directory):
+            if bucket.is_dir():
+                found.update(entry.name[:len(entry.name) - len(self.suffix)]
+                             for entry in os.scandir(bucket.path)
+                             if entry.name.endswith(self.suffix) and not entry.name.endswith('.tmp'))
+        return found
+
+    def prune(self, keep):
+        """Delete every entry whose key is not in keep; returns how many were removed"""
+        removed = 0
+        for key in self.keys() - set(keep):
+            try:
+                os.remove(self._path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def stats(self):
+        """Snapshot of hit/miss/write counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'directory': self.directory,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,136 @@
+"""Thread-safe chart rendering on matplotlib's object-oriented API.
+
+pyplot keeps one global "current figure", so two requests rendering at the
+same time can draw into each other's charts. This module never touches
+pyplot: every thread owns a pre-configured Figure per chart (a template with
+titles, labels and limits already set) on an Agg canvas. A render only
+removes the previous data artists and draws the new ones.
+"""
+import io
+import threading
+
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from analytics import compute_analytics
+from cache import LRUCache
+from database import GRADE_BANDS
+
+# Configure matplotlib
+rcParams['font.family'] = 'Arial'
+rcParams['font.size'] = 10
+
+BAR_COLORS = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe']
+
+# Pie slice colour per grade letter (matches the result page grade badges)
+GRADE_COLORS = dict(zip(
+    [letter for _, letter in GRADE_BANDS],
+    ['#FFD700', '#4CAF50', '#2196F3', '#9C27B0', '#FF9800', '#795548', '#607D8B', '#F44336'],
+))
+
+_templates = threading.local()
+
+def _subject_averages_template():
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title('📚 Subject-wise Average Marks', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Subjects')
+    ax.set_ylabel('Average Marks')
+    ax.set_ylim(0, 100)
+    return fig, ax
+
+def _grade_distribution_template():
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title('📊 Grade Distribution', fontsize=14, fontweight='bold')
+    return fig, ax
+
+def _template(name, factory):
+    """This thread's figure for a chart, emptied of the previous render's data"""
+    templates = _templates.__dict__
+    if name not in templates:
+        templates[name] = factory()
+    fig, ax = templates[name]
+    for artist in list(ax.patches) + list(ax.texts):
+        artist.remove()
+    # bar() also records a BarContainer per call; removing its patches leaves it behind
+    ax.containers.clear()
+    return fig, ax
+
+def _to_bytes(fig, fmt):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches='tight', dpi=100)
+    return buffer.getvalue()
+
+def render_subject_averages(analytics, fmt='png'):
+    """Bar chart of subject averages, best first"""
+    subject_data = sorted(
+        (subject for subject in analytics['subjects'] if subject['count']),
+        key=lambda subject: subject['average'], reverse=True
+    )
+    labels = [row['name'][:15] + '...' if len(row['name']) > 15 else row['name'] for row in subject_data]
+    averages = [row['average'] for row in subject_data]
+
+    fig, ax = _template('subject_averages', _subject_averages_template)
+    positions = range(len(averages))
+    bars = ax.bar(positions, averages, color=BAR_COLORS)
+    ax.set_xticks(positions, labels, rotation=15)
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height + 1,
+                f'{height:.1f}', ha='center', va='bottom', fontsize=9)
+
+    return _to_bytes(fig, fmt)
+
+def render_grade_distribution(analytics, fmt='png'):
+    """Pie chart of the grade distribution (same bands as the grade table)"""
+    grade_data = [grade for grade in analytics['grades'] if grade['count']]
+
+    fig, ax = _template('grade_distribution', _grade_distribution_template)
+    # pie() sets an equal aspect ratio itself
+    ax.pie([row['count'] for row in grade_data],
+           labels=[row['letter'] for row in grade_data],
+           colors=[GRADE_COLORS[row['letter']] for row in grade_data],
+           autopct='%1.1f%%', startangle=90)
+
+    return _to_bytes(fig, fmt)
+
+RENDERERS = {
+    'subject_averages': render_subject_averages,
+    'grade_distribution': render_grade_distribution,
+}
+
+CHART_FORMATS = ('png', 'svg')
+
+# Rendered chart images keyed by (chart name, format, data version)
+chart_cache = LRUCache(8 * 1024 * 1024, name='charts')
+
+def render_chart(name, analytics, fmt='png'):
+    """Render a chart by name to image bytes"""
+    return RENDERERS[name](analytics, fmt)
+
+def get_chart(conn, name, fmt, version):
+    """Image bytes for a chart, rendered at most once per data version"""
+    key = (name, fmt, version)
+    image = chart_cache.get(key)
+    if image is None:
+        image = render_chart(name, compute_analytics(conn), fmt)
+        chart_cache.put(key, image)
+    return image
+
+def prerender_charts(conn, version):
+    """Render every chart in every format for a data version into the cache; returns how many were rendered"""
+    analytics = None
+    rendered = 0
+    for name in RENDERERS:
+        for fmt in CHART_FORMATS:
+            if chart_cache.get((name, fmt, version)) is None:
+                analytics = analytics or compute_analytics(conn)
+                chart_cache.put((name, fmt, version), render_chart(name, analytics, fmt))
+                rendered += 1
+    return rendered
@@ -0,0 +1,180 @@
+"""Response compression negotiated on Accept-Encoding.
+
+compress_response() runs after every request. Text responses (HTML, JSON,
+CSV, SVG) of at least COMPRESS_MIN_BYTES are compressed with the best
+encoding both sides support: zstd or brotli when their optional packages
+are installed (pip install zstandard brotli), gzip always. Streamed
+responses are compressed chunk by chunk and flushed after each one, so the
+first rows still reach the browser straight away.
+
+Responses with an ETag are cached pages or images, identical for everyone
+at a data version, so their compressed bytes are kept in variant_cache:
+each variant is compressed once, at a higher level than a one-off body
+would get. Compressed responses get a weak ETag, since the bytes differ
+from the uncompressed ones; conditional requests still match.
+"""
+import threading
+import zlib
+
+from flask import request
+
+from cache import LRUCache
+
+try:
+    import brotli  # optional dependency
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # optional dependency
+except ImportError:
+    zstandard = None
+
+# Smaller bodies gain too little to be worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/csv', 'text/plain',
+    'application/json', 'application/javascript', 'image/svg+xml',
+}
+
+# Compressed copies of cached responses, keyed by (path, etag, encoding)
+variant_cache = LRUCache(8 * 1024 * 1024, name='compressed')
+
+def _gzip(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    return compressor.compress(data) + compressor.flush()
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def _brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+def _zstd_stream(chunks, level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    yield compressor.flush()
+
+# Encoding -> (compress(data, level), stream(chunks, level), one-off level, cached level),
+# in order of preference when the client accepts several equally
+ENCODINGS = {}
+if zstandard is not None:
+    ENCODINGS['zstd'] = (lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+                         _zstd_stream, 3, 19)
+if brotli is not None:
+    ENCODINGS['br'] = (lambda data, quality: brotli.compress(data, quality=quality),
+                       _brotli_stream, 4, 11)
+ENCODINGS['gzip'] = (_gzip, _gzip_stream, 6, 9)
+
+def choose_encoding(accept_encodings):
+    """Best supported encoding for an Accept-Encoding header, or None for identity"""
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class CompressionStats:
+    """Per-route response counts and bytes before and after compression"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, bytes_in, bytes_out, encoding):
+        with self._lock:
+            counts = self._routes.setdefault(route, {'responses': 0, 'compressed': 0, 'bytes_in': 0,
+                                                     'bytes_out': 0, 'encodings': {}})
+            counts['responses'] += 1
+            counts['bytes_in'] += bytes_in
+            counts['bytes_out'] += bytes_out
+            if encoding:
+                counts['compressed'] += 1
+                counts['encodings'][encoding] = counts['encodings'].get(encoding, 0) + 1
+
+    def stats(self):
+        """{route: counts with 'ratio' (bytes_out / bytes_in)} plus the totals"""
+        with self._lock:
+            routes = {route: dict(counts, encodings=dict(counts['encodings']))
+                      for route, counts in self._routes.items()}
+        total = {'responses': 0, 'compressed': 0, 'bytes_in': 0, 'bytes_out': 0}
+        for counts in routes.values():
+            for key in total:
+                total[key] += counts[key]
+        for counts in list(routes.values()) + [total]:
+            counts['ratio'] = counts['bytes_out'] / counts['bytes_in'] if counts['bytes_in'] else 1.0
+        return {'encodings': list(ENCODINGS), 'min_bytes': COMPRESS_MIN_BYTES, 'routes': routes, 'total': total}
+
+compression_stats = CompressionStats()
+
+def _counted_stream(chunks, original, route, encoding, stream, level):
+    """Compress a streamed body, recording its sizes once it has been sent"""
+    sizes = {'in': 0, 'out': 0}
+
+    def measured():
+        for chunk in chunks:
+            sizes['in'] += len(chunk)
+            yield chunk
+
+    try:
+        for piece in stream(measured(), level):
+            if piece:
+                sizes['out'] += len(piece)
+                yield piece
+    finally:
+        if hasattr(original, 'close'):
+            original.close()
+        compression_stats.record(route, sizes['in'], sizes['out'], encoding)
+
+def compress_response(response):
+    """after_request hook: compress the response body if the client and the content allow it"""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or request.method == 'HEAD' or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    route = request.endpoint or 'unknown'
+    encoding = choose_encoding(request.accept_encodings)
+    if response.is_streamed:
+        if encoding is None:
+            return response
+        _, stream, level, _ = ENCODINGS[encoding]
+        original = response.response
+        response.response = _counted_stream(response.iter_encoded(), original, route, encoding, stream, level)
+        response.headers.pop('Content-Length', None)
+        # Compressed bytes differ from the identity body, so the validator can only be weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    else:
+        data = response.get_data()
+        if encoding is None or len(data) < COMPRESS_MIN_BYTES:
+            compression_stats.record(route, len(data), len(data), None)
+            return response
+        compress, stream, level, cached_level = ENCODINGS[encoding]
+        etag, weak = response.get_etag()
+        if etag:
+            key = (request.full_path, etag, encoding)
+            compressed = variant_cache.get(key)
+            if compressed is None:
+                compressed = compress(data, cached_level)
+                variant_cache.put(key, compressed)
+            if not weak:
+                response.set_etag(etag, weak=True)
+        else:
+            compressed = compress(data, level)
+        response.set_data(compressed)
+        compression_stats.record(route, len(data), len(compressed), encoding)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -1,18 +1,464 @@
 import sqlite3
+import itertools
 import os
+import queue
+import sys
+import threading
+import time
 
-def create_database():
-    # Delete old database if exists
-    if os.path.exists('bca_results.db'):
-        os.remove('bca_results.db')
-        print("🗑️ Old database deleted")
+# Database file used by the app and every script
+DB_PATH = os.environ.get('BCA_RESULTS_DB', 'bca_results.db')
+
+# Pragmas applied to every new connection
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),        # readers don't block the writer
+    ('synchronous', 'NORMAL'),      # safe with WAL, far fewer fsyncs
+    ('cache_size', -16000),         # 16 MB page cache per connection
+    ('mmap_size', 268435456),       # memory-map up to 256 MB of the file
+    ('temp_store', 'MEMORY'),
+)
+
+def connect(db_path=None):
+    """Open a SQLite connection with the tuned pragmas applied"""
+    conn = sqlite3.connect(db_path or DB_PATH, check_same_thread=False)
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+class ConnectionPool:
+    """Thread-safe pool of pre-configured SQLite connections.
+
+    Connections are handed out with acquire() and given back with release().
+    When every pooled connection is busy an overflow connection is opened and
+    closed again on release, so callers never block waiting for the pool.
+    """
+
+    def __init__(self, db_path=None, max_size=8):
+        self.db_path = db_path or DB_PATH
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._counters = {
+            'created': 0,
+            'reused': 0,
+            'overflow': 0,
+            'released': 0,
+            'discarded': 0,
+        }
+        self._in_use = 0
+
+    def acquire(self):
+        """Take a connection from the pool, opening one if none is idle"""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._counters['reused'] += 1
+                self._in_use += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        conn = connect(self.db_path)
+        with self._lock:
+            self._counters['created'] += 1
+            self._in_use += 1
+            if self._in_use > self.max_size:
+                self._counters['overflow'] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+            self._counters['released'] += 1
+            keep = self._idle.qsize() < self.max_size
+            if not keep:
+                self._counters['discarded'] += 1
+        if keep:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._counters['discarded'] += 1
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_use'] = self._in_use
+        stats['idle'] = self._idle.qsize()
+        stats['max_size'] = self.max_size
+        stats['db_path'] = self.db_path
+        return stats
+
+# Shared pool used by the web app
+pool = ConnectionPool()
+
+# Insert a mark, or overwrite it if the student already has one for the subject
+UPSERT_MARK_SQL = '''
+    INSERT INTO marks (student_id, subject_id, marks) VALUES (?, ?, ?)
+    ON CONFLICT (student_id, subject_id) DO UPDATE SET marks = excluded.marks
+'''
+
+DELETE_MARK_SQL = 'DELETE FROM marks WHERE student_id = ? AND subject_id = ?'
+
+def create_indexes(cursor):
+    """Create the marks indexes, removing duplicate mark rows first"""
+    # Keep the newest row when a (student, subject) pair was entered twice
+    stale = 'id NOT IN (SELECT MAX(id) FROM marks GROUP BY student_id, subject_id)'
+    cursor.execute(f'SELECT COUNT(*) FROM marks WHERE {stale}')
+    duplicates = cursor.fetchone()[0]
+    if duplicates:
+        cursor.execute(f'DELETE FROM marks WHERE {stale}')
+        print(f"   ⚠️ Removed {duplicates} duplicate mark row(s), keeping the newest entry of each")
+    # Also serves lookups by student_id alone (leftmost column)
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_marks_student_subject ON marks (student_id, subject_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_marks_subject ON marks (subject_id)')
+
+# Grade letters by minimum percentage, best first
+GRADE_BANDS = (
+    (90, 'O'),
+    (80, 'A+'),
+    (70, 'A'),
+    (60, 'B+'),
+    (50, 'B'),
+    (45, 'C'),
+    (40, 'P'),
+    (0, 'F'),
+)
+PASS_MARK = 40
+
+def grade_case_sql(expr):
+    """SQL CASE expression mapping a percentage expression to a grade letter"""
+    whens = ' '.join(f"WHEN {expr} >= {minimum} THEN '{letter}'" for minimum, letter in GRADE_BANDS[:-1])
+    return f"CASE {whens} ELSE '{GRADE_BANDS[-1][1]}' END"
+
+def _summary_select_sql(where):
+    """SELECT producing student_results rows from the marks table"""
+    return f'''
+    SELECT student_id, total_marks, subject_count, percentage,
+           {grade_case_sql('percentage')}, percentage >= {PASS_MARK}
+    FROM (
+        SELECT student_id, SUM(marks) AS total_marks, COUNT(*) AS subject_count,
+               SUM(marks) * 100.0 / (COUNT(*) * 100) AS percentage
+        FROM marks {where}
+        GROUP BY student_id
+    )
+    '''
+
+def _refresh_summary_sql(student_ref):
+    """Trigger body statements that rebuild one student's summary row"""
+    return f'''
+        DELETE FROM student_results WHERE student_id = {student_ref};
+        INSERT INTO student_results (student_id, total_marks, subject_count, percentage, grade, passed)
+        {_summary_select_sql(f'WHERE student_id = {student_ref}')};
+    '''
+
+def create_results_summary(cursor):
+    """Create the student_results table, its triggers, and fill it from marks"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS student_results (
+        student_id INTEGER PRIMARY KEY,
+        total_marks INTEGER NOT NULL,
+        subject_count INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        grade VARCHAR(2) NOT NULL,
+        passed INTEGER NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id)
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_student_results_percentage ON student_results (percentage DESC)')
     
-    conn = sqlite3.connect('bca_results.db')
-    cursor = conn.cursor()
+    # Keep the summary current whenever marks change
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_insert_results AFTER INSERT ON marks
+    BEGIN {_refresh_summary_sql('NEW.student_id')} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_update_results AFTER UPDATE OF student_id, marks ON marks
+    BEGIN {_refresh_summary_sql('OLD.student_id')} {_refresh_summary_sql('NEW.student_id')} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_delete_results AFTER DELETE ON marks
+    BEGIN {_refresh_summary_sql('OLD.student_id')} END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_delete_results AFTER DELETE ON students
+    BEGIN DELETE FROM student_results WHERE student_id = OLD.id; END
+    ''')
     
+    rebuild_results_summary(cursor)
+
+def rebuild_results_summary(cursor):
+    """Recompute every student_results row from the marks table"""
+    cursor.execute('DELETE FROM student_results')
+    cursor.execute(f'''
+    INSERT INTO student_results (student_id, total_marks, subject_count, percentage, grade, passed)
+    {_summary_select_sql('')}
+    ''')
+
+def create_data_version(cursor):
+    """Add a data_version counter that triggers bump on every student or mark write"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 1)')
+    for table in ('marks', 'students'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+            BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END
+            ''')
+
+def create_mark_histogram(cursor):
+    """Add the per-subject mark histogram and the triggers that keep it current.
+
+    mark_histogram holds how many marks of each value every subject has.
+    Triggers apply each write as a delta (an updated mark moves one count
+    from the old value to the new one), so running count, sum, sum of
+    squares, min/max and grade-band counts can be read without scanning
+    marks.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS mark_histogram (
+        subject_id INTEGER NOT NULL,
+        marks INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (subject_id, marks)
+    ) WITHOUT ROWID
+    ''')
+    increment = '''
+        INSERT INTO mark_histogram (subject_id, marks, n) VALUES (NEW.subject_id, NEW.marks, 1)
+        ON CONFLICT (subject_id, marks) DO UPDATE SET n = n + 1;
+    '''
+    decrement = '''
+        UPDATE mark_histogram SET n = n - 1 WHERE subject_id = OLD.subject_id AND marks = OLD.marks;
+    '''
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_insert_histogram AFTER INSERT ON marks
+    WHEN NEW.marks IS NOT NULL AND NEW.subject_id IS NOT NULL
+    BEGIN {increment} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_delete_histogram AFTER DELETE ON marks
+    WHEN OLD.marks IS NOT NULL AND OLD.subject_id IS NOT NULL
+    BEGIN {decrement} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_update_histogram_old AFTER UPDATE OF subject_id, marks ON marks
+    WHEN OLD.marks IS NOT NULL AND OLD.subject_id IS NOT NULL AND (OLD.subject_id IS NOT NEW.subject_id OR OLD.marks IS NOT NEW.marks)
+    BEGIN {decrement} END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_marks_update_histogram_new AFTER UPDATE OF subject_id, marks ON marks
+    WHEN NEW.marks IS NOT NULL AND NEW.subject_id IS NOT NULL AND (OLD.subject_id IS NOT NEW.subject_id OR OLD.marks IS NOT NEW.marks)
+    BEGIN {increment} END
+    ''')
+    rebuild_mark_histogram(cursor)
+
+def rebuild_mark_histogram(cursor):
+    """Recompute mark_histogram from the marks table"""
+    cursor.execute('DELETE FROM mark_histogram')
+    cursor.execute('''
+    INSERT INTO mark_histogram (subject_id, marks, n)
+    SELECT subject_id, marks, COUNT(*) FROM marks
+    WHERE subject_id IS NOT NULL AND marks IS NOT NULL
+    GROUP BY subject_id, marks
+    ''')
+
+def create_rank_indexes(cursor):
+    """Index marks for per-subject leaderboards (ordered by marks, then student).
+
+    The new index starts with subject_id, so it replaces idx_marks_subject.
+    student_results is already ordered by idx_student_results_percentage
+    (its rowid is the student id).
+    """
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_marks_subject_rank ON marks (subject_id, marks DESC, student_id)')
+    cursor.execute('DROP INDEX IF EXISTS idx_marks_subject')
+
+def create_result_publications(cursor):
+    """Add result_publications: when each student's current result card was published.
+
+    content_hash identifies what the card shows. published_at only moves
+    when that hash changes, so a card rendered again later (after a cache
+    eviction, on another server) carries the same date.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS result_publications (
+        student_id INTEGER PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        published_at TEXT NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_students_delete_publications AFTER DELETE ON students
+    BEGIN DELETE FROM result_publications WHERE student_id = OLD.id; END
+    ''')
+
+def create_jobs(cursor):
+    """Add the jobs table: background report jobs and their results.
+
+    Rows are claimed by the job workers in id order (status 'queued' ->
+    'running' -> 'done' or 'failed'); worker_pid is the process running a
+    job, so jobs of a process that died can be queued again. dedup_key
+    identifies a request (kind, parameters and data version) so repeated
+    submissions share a job. Times are Unix timestamps.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        params TEXT NOT NULL,
+        dedup_key TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        worker_pid INTEGER,
+        progress INTEGER NOT NULL DEFAULT 0,
+        total INTEGER,
+        message TEXT,
+        error TEXT,
+        result_path TEXT,
+        result_name TEXT,
+        mimetype TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_dedup_key ON jobs (dedup_key)')
+
+def create_student_list_indexes(cursor):
+    """Index students for the paged students list, by name or roll number, optionally within a semester.
+
+    roll_no already has the index behind its UNIQUE constraint. Every page
+    is a range scan starting at the previous page's last key.
+    """
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_name ON students (name, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_semester_name ON students (semester, name, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_students_semester_roll_no ON students (semester, roll_no)')
+
+# Unix time, to the second, as stored in data_version.changed_at
+NOW_SQL = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+def add_data_version_timestamp(cursor):
+    """Record when the data version last moved, for Last-Modified headers.
+
+    The version triggers are recreated to set changed_at along with the
+    version; the per-row cost is one extra column in the same UPDATE.
+    """
+    cursor.execute('ALTER TABLE data_version ADD COLUMN changed_at INTEGER')
+    cursor.execute(f'UPDATE data_version SET changed_at = {NOW_SQL}')
+    for table in ('marks', 'students'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS trg_{table}_{event.lower()}_version')
+            cursor.execute(f'''
+            CREATE TRIGGER trg_{table}_{event.lower()}_version AFTER {event} ON {table}
+            BEGIN UPDATE data_version SET version = version + 1, changed_at = {NOW_SQL} WHERE id = 1; END
+            ''')
+
+def split_publication_hash(cursor):
+    """Date result cards by the student's own result only, and track cached card PDFs.
+
+    content_hash used to cover the class rank and renderer too, so one new
+    student re-dated every card. It now covers the student's details and
+    marks (result_cards.content_hash); existing rows are rehashed from the
+    current data so the upgrade itself keeps every date. card_key names the
+    PDF last cached for the student, so it can be deleted when replaced.
+    """
+    # Imported here: result_cards imports this module
+    from result_cards import content_hash
+    cursor.execute('ALTER TABLE result_publications ADD COLUMN card_key TEXT')
+    rows = cursor.execute('''
+    SELECT st.id, st.roll_no, st.name, st.semester,
+           r.total_marks, r.percentage, r.grade, r.passed,
+           s.subject_code, s.subject_name, m.marks
+    FROM result_publications p
+    JOIN students st ON st.id = p.student_id
+    JOIN student_results r ON r.student_id = st.id
+    JOIN marks m ON m.student_id = st.id
+    JOIN subjects s ON s.id = m.subject_id
+    ORDER BY st.id, s.subject_code
+    ''').fetchall()
+    hashes = []
+    for student_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        card = dict(zip(('student_id', 'roll_no', 'name', 'semester', 'total_marks',
+                         'percentage', 'grade', 'passed'), group[0][:8]))
+        card['marks'] = [list(row[8:]) for row in group]
+        hashes.append((content_hash(card), student_id))
+    cursor.executemany('UPDATE result_publications SET content_hash = ? WHERE student_id = ?', hashes)
+
+def bump_data_version(cursor):
+    """Mark cached views as stale (for writes made with triggers suspended)"""
+    cursor.execute(f'UPDATE data_version SET version = version + 1, changed_at = {NOW_SQL} WHERE id = 1')
+
+def get_data_version(conn):
+    """Current data version; changes whenever students or marks change"""
+    return conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()[0]
+
+def get_data_stamp(conn):
+    """(version, changed_at): the data version and the Unix time it was reached"""
+    return conn.execute('SELECT version, changed_at FROM data_version WHERE id = 1').fetchone()
+
+def suspend_triggers(cursor, indexes=False):
+    """Drop every trigger (and optionally every index) and return their SQL.
+
+    Bulk loads run much faster without per-row trigger and index work; pass
+    the result to restore_triggers() afterwards, then call
+    rebuild_derived_tables() to catch the derived tables up.
+    """
+    types = ('trigger', 'index') if indexes else ('trigger',)
+    cursor.execute(f'''
+    SELECT type, name, sql FROM sqlite_master
+    WHERE type IN ({', '.join('?' * len(types))}) AND sql IS NOT NULL
+    ''', types)
+    objects = cursor.fetchall()
+    for object_type, name, _ in objects:
+        cursor.execute(f'DROP {object_type.upper()} {name}')
+    # Indexes are rebuilt before triggers are reattached
+    return [sql for object_type, _, sql in sorted(objects, key=lambda o: o[0] != 'index')]
+
+def restore_triggers(cursor, saved_sql):
+    """Recreate the objects dropped by suspend_triggers()"""
+    for sql in saved_sql:
+        cursor.execute(sql)
+
+def rebuild_derived_tables(cursor):
+    """Recompute every trigger-maintained table from the base tables"""
+    rebuild_results_summary(cursor)
+    rebuild_mark_histogram(cursor)
+    bump_data_version(cursor)
+
+# All your BCA 5th Semester Subjects
+BCA_SUBJECTS = [
+    ('0527001', 'Java Programming', 4),
+    ('0527002', 'Computer Networks', 4),
+    ('0527003', 'Computer Graphics & Multimedia Applications', 4),
+    ('0527004', 'IT Trends & Technologies', 4),
+    ('0527065', 'Minor Project', 4),
+    ('0527080', 'Java & Computer Graphics Lab', 4)
+]
+
+def create_base_tables(cursor):
+    """Create the students, subjects and marks tables and seed the subjects"""
     # Students Table
     cursor.execute('''
-    CREATE TABLE students (
+    CREATE TABLE IF NOT EXISTS students (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         roll_no VARCHAR(20) UNIQUE NOT NULL,
         name VARCHAR(100) NOT NULL,
@@ -24,7 +470,7 @@ def create_database():
     
     # Subjects Table - SIMPLIFIED without subject_type
     cursor.execute('''
-    CREATE TABLE subjects (
+    CREATE TABLE IF NOT EXISTS subjects (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         subject_code VARCHAR(20) UNIQUE,
         subject_name VARCHAR(100) NOT NULL,
@@ -32,21 +478,13 @@ def create_database():
     )
     ''')
     
-    # Insert ALL your BCA 5th Semester Subjects
-    bca_subjects = [
-        ('0527001', 'Java Programming', 4),
-        ('0527002', 'Computer Networks', 4),
-        ('0527003', 'Computer Graphics & Multimedia Applications', 4),
-        ('0527004', 'IT Trends & Technologies', 4),
-        ('0527065', 'Minor Project', 4),
-        ('0527080', 'Java & Computer Graphics Lab', 4)
-    ]
-    
-    cursor.executemany('INSERT INTO subjects (subject_code, subject_name, credits) VALUES (?, ?, ?)', bca_subjects)
+    cursor.execute('SELECT COUNT(*) FROM subjects')
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany('INSERT INTO subjects (subject_code, subject_name, credits) VALUES (?, ?, ?)', BCA_SUBJECTS)
     
     # Marks Table
     cursor.execute('''
-    CREATE TABLE marks (
+    CREATE TABLE IF NOT EXISTS marks (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         student_id INTEGER,
         subject_id INTEGER,
@@ -55,13 +493,77 @@ def create_database():
         FOREIGN KEY (subject_id) REFERENCES subjects(id)
     )
     ''')
+
+# Ordered schema migrations: (user_version, description, step).
+# Steps receive a cursor inside an open transaction. Never edit a released
+# step; append a new one instead.
+MIGRATIONS = [
+    (1, 'Create students, subjects and marks tables', create_base_tables),
+    (2, 'Index marks on (student_id, subject_id) and subject_id', create_indexes),
+    (3, 'Add student_results summary table and triggers', create_results_summary),
+    (4, 'Add data_version counter and triggers', create_data_version),
+    (5, 'Add mark_histogram running statistics and triggers', create_mark_histogram),
+    (6, 'Index marks on (subject_id, marks, student_id) for rankings', create_rank_indexes),
+    (7, 'Add result_publications for stable result card dates', create_result_publications),
+    (8, 'Add jobs table for background report generation', create_jobs),
+    (9, 'Index students by name and by semester for the paged students list', create_student_list_indexes),
+    (10, 'Timestamp data_version changes for Last-Modified headers', add_data_version_timestamp),
+    (11, 'Hash result publications by student result only; track cached card PDFs', split_publication_hash),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(db_path=None, verbose=True):
+    """Apply pending migrations in order, each in its own transaction.
+
+    Returns the list of (version, description, seconds) that were applied.
+    """
+    conn = connect(db_path)
+    conn.isolation_level = None  # explicit BEGIN/COMMIT around each step
+    cursor = conn.cursor()
+    current = cursor.execute('PRAGMA user_version').fetchone()[0]
+    applied = []
+    
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        started = time.perf_counter()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            step(cursor)
+            cursor.execute(f'PRAGMA user_version = {version}')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            conn.close()
+            raise
+        elapsed = time.perf_counter() - started
+        applied.append((version, description, elapsed))
+        if verbose:
+            print(f"   ✅ Migration {version}: {description} ({elapsed:.3f}s)")
     
-    conn.commit()
     conn.close()
-    print("✅ Database created with ALL 6 BCA subjects!")
-    print("   Subjects added:")
-    for code, name, _ in bca_subjects:
+    return applied
+
+def create_database(reset=False):
+    """Create or upgrade the database in place (reset=True starts from scratch)"""
+    if reset:
+        # Delete old database if exists
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
+            print("🗑️ Old database deleted")
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(DB_PATH + suffix):
+                os.remove(DB_PATH + suffix)
+    
+    applied = migrate()
+    if applied:
+        print(f"✅ Database at schema version {SCHEMA_VERSION} ({len(applied)} migration(s) applied)")
+    else:
+        print(f"✅ Database already at schema version {SCHEMA_VERSION}")
+    print("   Subjects:")
+    for code, name, _ in BCA_SUBJECTS:
         print(f"   • {code} - {name}")
 
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    create_database(reset='--reset' in sys.argv)
\ No newline at end of file
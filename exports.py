@@ -0,0 +1,170 @@
+"""Whole-class result sheet export as CSV, XLSX or Parquet.
+
+One query pivots marks into a column per subject, walking students in
+roll number order through the roll_no index and each student's marks
+through idx_marks_student_subject, so rows come out already sorted and
+nothing is buffered in SQLite. CSV is streamed from that cursor in chunks.
+XLSX rows go straight from the cursor into a write-only openpyxl workbook
+(pandas' to_excel builds every cell object first and took about twice as
+long); Parquet is written with pandas from the same rows, and is only
+offered where the optional pyarrow package is installed.
+
+Usage: python exports.py results.csv [--format csv|xlsx|parquet] [--semester 5]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+from openpyxl import Workbook
+
+from database import DB_PATH, connect
+
+try:
+    import pyarrow  # noqa: F401  (optional dependency, only for Parquet)
+except ImportError:
+    pyarrow = None
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+if pyarrow is not None:
+    EXPORT_FORMATS['parquet'] = 'application/vnd.apache.parquet'
+
+def unknown_format_message(fmt):
+    """Error text for a format that is not in EXPORT_FORMATS"""
+    message = f"Unknown export format '{fmt}'. Use {', '.join(EXPORT_FORMATS)}."
+    if fmt == 'parquet':
+        message += ' Parquet export needs pyarrow: pip install pyarrow'
+    return message
+
+# Rows written per CSV chunk yielded to the response
+CSV_CHUNK_ROWS = 1000
+
+def result_sheet_query(conn, semester=None):
+    """(columns, sql, params) for the pivoted result sheet"""
+    subjects = conn.execute('SELECT id, subject_code FROM subjects ORDER BY subject_code').fetchall()
+    pivot = ''.join(
+        f',\n           MAX(CASE WHEN m.subject_id = {subject_id} THEN m.marks END)'
+        for subject_id, _ in subjects
+    )
+    where = 'WHERE st.semester = ?' if semester is not None else ''
+    # Grouping by the unique roll_no lets SQLite stream groups in index order
+    sql = f'''
+    SELECT st.roll_no, st.name, st.semester{pivot},
+           r.total_marks, ROUND(r.percentage, 2), r.grade,
+           CASE WHEN r.passed THEN 'PASS' WHEN r.passed = 0 THEN 'FAIL' END
+    FROM students st
+    LEFT JOIN marks m ON m.student_id = st.id
+    LEFT JOIN student_results r ON r.student_id = st.id
+    {where}
+    GROUP BY st.roll_no
+    ORDER BY st.roll_no
+    '''
+    columns = (['roll_no', 'name', 'semester'] + [code for _, code in subjects]
+               + ['total_marks', 'percentage', 'grade', 'result'])
+    return columns, sql, (semester,) if semester is not None else ()
+
+def iter_csv(conn, semester=None, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield the result sheet as CSV text, a chunk of rows at a time"""
+    columns, sql, params = result_sheet_query(conn, semester)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def result_sheet_dataframe(conn, semester=None):
+    """The result sheet as a DataFrame (marks as nullable integers)"""
+    columns, sql, params = result_sheet_query(conn, semester)
+    df = pd.DataFrame.from_records(conn.execute(sql, params), columns=columns)
+    for column in columns[3:-3]:
+        df[column] = df[column].astype('Int64')
+    return df
+
+def write_xlsx(conn, fileobj, semester=None):
+    """Write the result sheet as an XLSX workbook, row by row"""
+    columns, sql, params = result_sheet_query(conn, semester)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append(columns)
+    for row in conn.execute(sql, params):
+        sheet.append(row)
+    workbook.save(fileobj)
+
+def write_parquet(conn, fileobj, semester=None):
+    """Write the result sheet as a Parquet file (needs pyarrow)"""
+    if pyarrow is None:
+        raise ValueError(unknown_format_message('parquet'))
+    result_sheet_dataframe(conn, semester).to_parquet(fileobj, index=False)
+
+# Binary formats, written whole to a file object
+FILE_WRITERS = {'xlsx': write_xlsx, 'parquet': write_parquet}
+
+def export_bytes(conn, fmt, semester=None):
+    """The result sheet as XLSX or Parquet file bytes"""
+    if fmt not in FILE_WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    buffer = io.BytesIO()
+    FILE_WRITERS[fmt](conn, buffer, semester)
+    return buffer.getvalue()
+
+def write_export(conn, path, fmt, semester=None):
+    """Write the result sheet to a file in any export format"""
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in iter_csv(conn, semester):
+                f.write(chunk)
+    elif fmt in FILE_WRITERS:
+        with open(path, 'wb') as f:
+            FILE_WRITERS[fmt](conn, f, semester)
+    else:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+
+def export_filename(fmt, semester=None):
+    """Download name such as bca_results_sem5.csv"""
+    suffix = f'_sem{semester}' if semester is not None else ''
+    return f'bca_results{suffix}.{fmt}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the whole-class result sheet.')
+    parser.add_argument('output', help='output file')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help='file format (default: from the output extension)')
+    parser.add_argument('--semester', type=int, help='only students of this semester')
+    parser.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    args = parser.parse_args()
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt == 'parquet' and fmt not in EXPORT_FORMATS:
+        parser.error(unknown_format_message(fmt))
+    if fmt not in EXPORT_FORMATS:
+        parser.error(f"can't tell the format of '{args.output}'; pass --format")
+
+    conn = connect(args.db)
+    started = time.perf_counter()
+    try:
+        write_export(conn, args.output, fmt, args.semester)
+    except ValueError as error:
+        print(f"❌ {error}")
+        return 1
+    finally:
+        conn.close()
+    size = os.path.getsize(args.output)
+    print(f"✅ Wrote {args.output} ({size / 1024:,.0f} KB) in {time.perf_counter() - started:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
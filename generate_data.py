@@ -0,0 +1,165 @@
+"""Generate a synthetic students/marks dataset for load testing.
+
+Builds N students spread over K semesters with marks in M subjects, using
+the same performance distribution as add_real_students.py. Output is fully
+determined by --seed, so the same arguments always give the same database.
+Everything already in the target database is replaced, so --db is required
+and the app's own database is only overwritten with --force.
+
+Usage: python generate_data.py --students 1000000 --subjects 6 --semesters 2 --db bench.db
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from database import (DB_PATH, BCA_SUBJECTS, connect, migrate, suspend_triggers,
+                      restore_triggers, rebuild_derived_tables)
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Krishna", "Reyansh", "Atharv", "Advik",
+    "Ananya", "Saanvi", "Diya", "Anika", "Aadhya", "Navya", "Pari", "Myra", "Avni", "Kiara",
+    "Rahul", "Priya", "Amit", "Sneha", "Vikram", "Anjali", "Rajesh", "Meera", "Karan", "Neha",
+    "Rohan", "Swati", "Sanjay", "Pooja", "Deepak", "Ritu", "Manoj", "Sunita", "Vijay", "Lata",
+    "Raj", "Seema", "Anil", "Kavita", "Suresh", "Geeta",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Patel", "Kumar", "Singh", "Reddy", "Joshi", "Mehta", "Gupta", "Khan",
+    "Malhotra", "Jain", "Bhatt", "Nair", "Desai", "Iyer", "Yadav", "Agarwal", "Bansal", "Chopra",
+    "Das", "Kapoor", "Mishra", "Rao", "Saxena", "Thakur", "Kaur", "Mathur", "Naik", "Pandey",
+    "Rathore", "Seth", "Trivedi", "Ahuja", "Bhardwaj", "Chaudhry", "Dubey", "Gokhale", "Kulkarni",
+    "Menon", "Pillai",
+]
+
+# Performance bands by (student index % 10): 20% / 30% / 30% / 20%,
+# each a (low, high) range before +/-5 noise, as in add_real_students.py
+BAND_LOW = np.array([85, 85, 75, 75, 75, 60, 60, 60, 40, 40])
+BAND_HIGH = np.array([95, 95, 84, 84, 84, 74, 74, 74, 59, 59])
+
+# Students generated and inserted per batch
+CHUNK_SIZE = 100_000
+
+def build_subjects(count):
+    """The BCA subjects first, then numbered electives if more are requested"""
+    subjects = list(BCA_SUBJECTS[:count])
+    for number in range(len(subjects) + 1, count + 1):
+        subjects.append((f'05279{number:02d}', f'Elective {number}', 4))
+    return subjects
+
+def generate_dataset(db_path, students=46, subjects=6, semesters=1,
+                     first_semester=5, seed=2024, verbose=True):
+    """Replace the data in db_path with a generated dataset and return load stats"""
+    started = time.perf_counter()
+    migrate(db_path, verbose=verbose)
+
+    conn = connect(db_path)
+    conn.isolation_level = None  # one explicit transaction for the whole load
+    cursor = conn.cursor()
+    # Bulk-load mode: no rollback journal, no fsyncs, big page cache
+    cursor.execute('PRAGMA journal_mode=OFF')
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA cache_size=-262144')
+
+    rng = np.random.default_rng(seed)
+    subject_rows = build_subjects(subjects)
+    width = max(3, len(str(students)))
+
+    cursor.execute('BEGIN')
+    # Background job results describe the old data; their files go once the load commits
+    job_files = [path for (path,) in cursor.execute('SELECT result_path FROM jobs WHERE result_path IS NOT NULL')]
+    saved_schema = suspend_triggers(cursor, indexes=True)
+    cursor.execute('DELETE FROM jobs')
+    cursor.execute('DELETE FROM result_publications')
+    cursor.execute('DELETE FROM marks')
+    cursor.execute('DELETE FROM students')
+    cursor.execute('DELETE FROM subjects')
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('marks', 'students', 'subjects')")
+    cursor.executemany(
+        'INSERT INTO subjects (id, subject_code, subject_name, credits) VALUES (?, ?, ?, ?)',
+        [(i, *row) for i, row in enumerate(subject_rows, 1)]
+    )
+
+    for offset in range(0, students, CHUNK_SIZE):
+        count = min(CHUNK_SIZE, students - offset)
+        ids = np.arange(offset + 1, offset + count + 1)
+
+        firsts = rng.integers(0, len(FIRST_NAMES), count)
+        lasts = rng.integers(0, len(LAST_NAMES), count)
+
+        band = (ids - 1) % 10
+        low = BAND_LOW[band][:, None]
+        high = BAND_HIGH[band][:, None]
+        marks = low + np.floor(rng.random((count, subjects)) * (high - low + 1)).astype(np.int64)
+        marks += rng.integers(-5, 6, (count, subjects))
+        np.clip(marks, 35, 100, out=marks)
+
+        # Each chunk is one statement: SQLite expands the JSON arrays with
+        # json_each(), which is far cheaper than binding rows one by one
+        names = [f'{FIRST_NAMES[first]} {LAST_NAMES[last]}' for first, last in zip(firsts.tolist(), lasts.tolist())]
+        cursor.execute(f'''
+            INSERT INTO students (id, roll_no, name, semester)
+            SELECT ?1 + n.key, 'BCA2024' || substr('{"0" * width}' || (?1 + n.key), -{width}),
+                   n.value, ?2 + (?1 - 1 + n.key) % ?3
+            FROM json_each(?4) AS n
+        ''', (offset + 1, first_semester, semesters, json.dumps(names)))
+        cursor.execute('''
+            INSERT INTO marks (student_id, subject_id, marks)
+            SELECT ?1 + m.key / ?2, 1 + m.key % ?2, m.value
+            FROM json_each(?3) AS m
+        ''', (offset + 1, subjects, json.dumps(marks.ravel().tolist())))
+        if verbose:
+            print(f"   ✅ Generated {offset + count:,} students...")
+
+    loaded = time.perf_counter()
+    restore_triggers(cursor, saved_schema)
+    rebuild_derived_tables(cursor)
+    cursor.execute('COMMIT')
+    for path in job_files:
+        if os.path.exists(path):
+            os.remove(path)
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA analysis_limit=1000')  # sampled stats are enough for the planner
+    cursor.execute('ANALYZE')
+    conn.close()
+    finished = time.perf_counter()
+
+    return {
+        'students': students,
+        'subjects': subjects,
+        'semesters': semesters,
+        'marks': students * subjects,
+        'load_seconds': loaded - started,
+        'rebuild_seconds': finished - loaded,  # indexes + derived tables
+        'total_seconds': finished - started,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic BCA results dataset.')
+    parser.add_argument('--students', type=int, default=46, help='number of students (default 46)')
+    parser.add_argument('--subjects', type=int, default=6, help='number of subjects (default 6)')
+    parser.add_argument('--semesters', type=int, default=1, help='number of semesters students are spread over')
+    parser.add_argument('--first-semester', type=int, default=5, help='number of the first semester (default 5)')
+    parser.add_argument('--seed', type=int, default=2024, help='random seed (default 2024)')
+    parser.add_argument('--db', required=True, help='database file to fill; its current data is replaced')
+    parser.add_argument('--force', action='store_true', help=f"allow replacing the app's database ({DB_PATH})")
+    args = parser.parse_args()
+    if os.path.abspath(args.db) == os.path.abspath(DB_PATH) and not args.force:
+        parser.error(f"{args.db} is the app's database; pass --force to replace its data")
+
+    print(f"🎓 Generating {args.students:,} students x {args.subjects} subjects into {args.db}...")
+    stats = generate_dataset(args.db, args.students, args.subjects, args.semesters,
+                             args.first_semester, args.seed)
+
+    print("\n" + "="*50)
+    print("🎉 DATASET GENERATED")
+    print("="*50)
+    print(f"👨‍🎓 Students: {stats['students']:,} across {stats['semesters']} semester(s)")
+    print(f"📚 Subjects: {stats['subjects']}")
+    print(f"📝 Marks Entries: {stats['marks']:,}")
+    print(f"⏱️ Load: {stats['load_seconds']:.2f}s, index/summary rebuild: {stats['rebuild_seconds']:.2f}s, "
+          f"total: {stats['total_seconds']:.2f}s ({stats['marks'] / stats['total_seconds']:,.0f} marks/sec)")
+
+if __name__ == '__main__':
+    main()
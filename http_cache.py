@@ -0,0 +1,107 @@
+"""Conditional GET for pages that only change when the data does.
+
+Every page here is a function of the data version (or, for a result card,
+of one student's card content), so its ETag is derived from that version
+and Last-Modified from the time the version was reached. A client or
+reverse proxy that sends back If-None-Match / If-Modified-Since gets a
+bodiless 304 without the page being rendered at all. Clients without a
+copy are served from page_cache, which holds rendered pages per version.
+
+Cache-Control lets browsers keep a copy but revalidate on every use, while
+shared caches may serve it for BCA_SHARED_MAX_AGE seconds (default 10)
+without asking; on result day that turns a burst of identical requests
+into one revalidation per proxy every few seconds. One student's result
+page or card is private: only that student's browser may keep it.
+
+Page ETags are weak, on the 200 and the 304 alike: compress.py sends a
+page's bytes in different encodings, so only the meaning is identical.
+A result card PDF is never re-encoded, so its ETag stays strong.
+"""
+import datetime
+import hashlib
+import os
+import threading
+
+from flask import Response, make_response, request
+from werkzeug.http import is_resource_modified
+
+from cache import LRUCache
+
+SHARED_MAX_AGE = int(os.environ.get('BCA_SHARED_MAX_AGE', '10'))
+
+# Rendered pages keyed by (page, ..., data version)
+page_cache = LRUCache(16 * 1024 * 1024, name='pages')
+
+def cache_control(private=False):
+    """Cache-Control for a page: revalidate in browsers, briefly reusable in shared caches unless private"""
+    if private:
+        return 'private, no-cache'
+    if SHARED_MAX_AGE > 0:
+        return f'public, max-age=0, s-maxage={SHARED_MAX_AGE}'
+    return 'public, no-cache'
+
+def version_etag(name, version):
+    """ETag for a page at a data version, e.g. analysis-v42"""
+    return f'{name}-v{version}'
+
+def content_etag(data):
+    """ETag for fixed content: a digest of the bytes themselves"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def http_date(timestamp):
+    """Last-Modified value for a Unix time (None stays None)"""
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+class ConditionalStats:
+    """Per-route counts of conditional requests answered with 304 vs a full body"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, not_modified):
+        with self._lock:
+            counts = self._routes.setdefault(route, {'not_modified': 0, 'full': 0})
+            counts['not_modified' if not_modified else 'full'] += 1
+
+    def stats(self):
+        """{route: {'not_modified', 'full', 'hit_ratio'}} plus the totals"""
+        with self._lock:
+            routes = {route: dict(counts) for route, counts in self._routes.items()}
+        total = {'not_modified': 0, 'full': 0}
+        for counts in routes.values():
+            total['not_modified'] += counts['not_modified']
+            total['full'] += counts['full']
+        for counts in list(routes.values()) + [total]:
+            answered = counts['not_modified'] + counts['full']
+            counts['hit_ratio'] = counts['not_modified'] / answered if answered else 0.0
+        return {'routes': routes, 'total': total}
+
+conditional_stats = ConditionalStats()
+
+def conditional(route, etag, last_modified, render, private=False, weak=True):
+    """304 if the client's copy matches etag/last_modified, otherwise render()'s response.
+
+    render is only called when a body is needed. Both answers carry the
+    same validators and Cache-Control so the next request can be
+    conditional too. Pass private=True for one student's data, and
+    weak=False for a file that is always sent byte for byte.
+    """
+    not_modified = not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+    conditional_stats.record(route, not_modified)
+    response = Response(status=304) if not_modified else make_response(render())
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control(private)
+    return response
+
+def cached_page(key, render):
+    """HTML response from page_cache, rendering (and storing) it on a miss"""
+    body = page_cache.get(key)
+    if body is None:
+        body = render().encode()
+        page_cache.put(key, body)
+    return Response(body, mimetype='text/html')
@@ -0,0 +1,115 @@
+"""Bulk marks import from CSV/XLSX sheets.
+
+A sheet has one row per mark with the columns roll_no, subject_code and
+marks. IDs are resolved through two lookup maps built with one query each,
+and every valid row is written with a single executemany() in one
+transaction.
+
+Usage: python importer.py marks.csv
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+from database import connect, UPSERT_MARK_SQL
+
+REQUIRED_COLUMNS = ('roll_no', 'subject_code', 'marks')
+SHEET_EXTENSIONS = ('.csv', '.xlsx')
+
+# Cap on the number of row errors kept in a report
+MAX_REPORTED_ERRORS = 500
+
+def read_marks_sheet(fileobj, filename):
+    """Parse an uploaded CSV or Excel sheet into a DataFrame of strings"""
+    extension = os.path.splitext(filename.lower())[1]
+    if extension == '.csv':
+        df = pd.read_csv(fileobj, dtype=str, keep_default_na=False, skipinitialspace=True)
+    elif extension == '.xlsx':
+        df = pd.read_excel(fileobj, dtype=str).fillna('')
+    else:
+        raise ValueError(f"Unsupported file type '{extension or filename}'. Upload a .csv or .xlsx file.")
+
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return df[list(REQUIRED_COLUMNS)]
+
+def import_marks(conn, fileobj, filename):
+    """Validate a marks sheet and upsert every valid row in one transaction.
+
+    Returns a report dict with row counts, row errors (sheet line number and
+    message), elapsed seconds and rows per second.
+    """
+    started = time.perf_counter()
+    df = read_marks_sheet(fileobj, filename)
+
+    cursor = conn.cursor()
+    cursor.execute('SELECT roll_no, id FROM students')
+    student_ids = dict(cursor.fetchall())
+    cursor.execute('SELECT subject_code, id FROM subjects')
+    subject_ids = dict(cursor.fetchall())
+
+    roll_nos = df['roll_no'].str.strip()
+    subject_codes = df['subject_code'].str.strip()
+    student_col = roll_nos.map(student_ids)
+    subject_col = subject_codes.map(subject_ids)
+    marks_col = pd.to_numeric(df['marks'].str.strip(), errors='coerce')
+
+    bad_student = student_col.isna()
+    bad_subject = subject_col.isna()
+    bad_marks = marks_col.isna() | (marks_col % 1 != 0) | (marks_col < 0) | (marks_col > 100)
+    invalid = bad_student | bad_subject | bad_marks
+
+    errors = []
+    error_count = int(invalid.sum())
+    for index in invalid[invalid].index[:MAX_REPORTED_ERRORS]:
+        problems = []
+        if bad_student[index]:
+            problems.append(f"unknown roll_no '{roll_nos[index]}'")
+        if bad_subject[index]:
+            problems.append(f"unknown subject_code '{subject_codes[index]}'")
+        if bad_marks[index]:
+            problems.append(f"marks '{df['marks'][index]}' must be a whole number from 0 to 100")
+        # +2: header line and 1-based numbering
+        errors.append((int(index) + 2, '; '.join(problems)))
+
+    valid = ~invalid
+    rows = list(zip(
+        student_col[valid].astype(int).tolist(),
+        subject_col[valid].astype(int).tolist(),
+        marks_col[valid].astype(int).tolist(),
+    ))
+
+    with conn:
+        conn.executemany(UPSERT_MARK_SQL, rows)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'filename': filename,
+        'rows_read': len(df),
+        'rows_imported': len(rows),
+        'error_count': error_count,
+        'errors': errors,
+        'seconds': elapsed,
+        'rows_per_second': len(df) / elapsed if elapsed > 0 else 0.0,
+    }
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    path = sys.argv[1]
+    conn = connect()
+    with open(path, 'rb') as sheet:
+        report = import_marks(conn, sheet, path)
+    conn.close()
+
+    print(f"✅ Imported {report['rows_imported']} of {report['rows_read']} rows "
+          f"in {report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/sec)")
+    if report['error_count']:
+        print(f"⚠️ {report['error_count']} row(s) rejected:")
+        for line, message in report['errors']:
+            print(f"   • line {line}: {message}")
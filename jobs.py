@@ -0,0 +1,460 @@
+"""Background jobs for slow reports: card ZIPs, booklets, exports and charts.
+
+A job is a row in the jobs table. submit() records it and wakes the job
+workers: JOB_WORKERS threads per server process that claim queued rows in
+id order and run them, so page requests never wait on a report. The report
+kinds run in a separate process pool at a lower CPU priority, one core per
+job, so they neither hold the web process's GIL nor win the CPU over page
+requests; 'charts' runs in the worker thread itself because it fills this
+process's chart cache and distribution statistics. Results are files in JOB_DIR, removed after
+JOB_RETENTION. Queued jobs survive a restart, and jobs that were running
+in a process that died are queued again when workers start.
+
+Admission limits: at most JOB_WORKERS jobs run at once per process, at
+most MAX_QUEUED_JOBS wait (submit() raises QueueFull beyond that), and a
+request identical to a queued, running or finished job (same kind,
+parameters and data version) gets that job back instead of a new one. A
+job still waiting has not read any data yet, so it is also reused for
+the same kind and parameters after the data has changed.
+
+Usage:
+    python jobs.py submit booklet [--semester 5]   # run by a server's workers, or by `work`
+    python jobs.py list
+    python jobs.py work                            # run job workers without the web server
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from booklet import booklet_filename, write_booklet
+from charts import prerender_charts
+from database import DB_PATH, connect, get_data_version
+from exports import EXPORT_FORMATS, export_filename, unknown_format_message, write_export
+from mark_statistics import get_statistics
+from processes import process_pool
+from result_cards import cards_zip_filename, iter_zip, render_in_process, select_students
+
+# Jobs running at once per process, and jobs allowed to wait
+JOB_WORKERS = int(os.environ.get('BCA_JOB_WORKERS', 1))
+MAX_QUEUED_JOBS = int(os.environ.get('BCA_MAX_QUEUED_JOBS', 20))
+# Added to the job processes' niceness so page requests get the CPU first
+JOB_NICENESS = 10
+JOB_DIR = os.environ.get('BCA_JOB_DIR', 'job_output')
+# Finished jobs and their files are removed after a day
+JOB_RETENTION = 24 * 60 * 60
+# Idle workers also check for jobs submitted by other processes this often
+POLL_SECONDS = 5
+# Progress is written to the jobs table at most this often
+PROGRESS_INTERVAL = 1.0
+# A worker pauses this long after an unexpected error before carrying on
+ERROR_PAUSE_SECONDS = 1
+
+class QueueFull(Exception):
+    """Raised by submit() when MAX_QUEUED_JOBS jobs are already waiting"""
+
+def _output_path(job, extension):
+    return os.path.join(JOB_DIR, f"job_{job['id']}.{extension}")
+
+def run_cards_job(conn, job, on_progress):
+    """ZIP of result cards for a semester, listed students or everyone"""
+    params = job['params']
+    student_ids = select_students(conn, params.get('semester'), params.get('ids'))
+    if not student_ids:
+        raise ValueError('None of the selected students have marks yet')
+    path = _output_path(job, 'zip')
+    with open(path, 'wb') as f:
+        for chunk in iter_zip(conn, student_ids, on_progress=on_progress):
+            f.write(chunk)
+    return {'path': path, 'name': cards_zip_filename(params.get('semester')),
+            'mimetype': 'application/zip', 'message': f'{len(student_ids)} result cards'}
+
+def run_booklet_job(conn, job, on_progress):
+    """One PDF with a result card page per student"""
+    semester = job['params'].get('semester')
+    path = _output_path(job, 'pdf')
+    pages = write_booklet(conn, path, semester, on_progress=on_progress)
+    if not pages:
+        os.remove(path)
+        raise ValueError('None of the selected students have marks yet')
+    return {'path': path, 'name': booklet_filename(semester),
+            'mimetype': 'application/pdf', 'message': f'{pages} pages'}
+
+def run_export_job(conn, job, on_progress):
+    """The whole-class result sheet as CSV, XLSX or Parquet"""
+    fmt = job['params']['format']
+    semester = job['params'].get('semester')
+    path = _output_path(job, fmt)
+    write_export(conn, path, fmt, semester)
+    return {'path': path, 'name': export_filename(fmt, semester),
+            'mimetype': EXPORT_FORMATS[fmt], 'message': f'{fmt.upper()} result sheet'}
+
+def run_charts_job(conn, job, on_progress):
+    """Render every chart and compute the distribution statistics for the current data"""
+    version = get_data_version(conn)
+    rendered = prerender_charts(conn, version)
+    get_statistics(conn, version)
+    return {'message': f'{rendered} chart image(s) rendered'}
+
+JOB_KINDS = {
+    'cards': run_cards_job,
+    'booklet': run_booklet_job,
+    'export': run_export_job,
+    'charts': run_charts_job,
+}
+
+# Kinds run in the worker thread instead of a job process
+IN_PROCESS_KINDS = {'charts'}
+
+def clean_params(kind, params):
+    """Validated parameters for a job kind from a form or JSON body; raises ValueError"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'. Use {', '.join(JOB_KINDS)}.")
+    clean = {}
+    if kind == 'charts':
+        return clean
+    semester = params.get('semester')
+    if semester not in (None, ''):
+        try:
+            clean['semester'] = int(semester)
+        except (TypeError, ValueError):
+            raise ValueError('semester must be a number')
+    if kind == 'cards' and params.get('ids'):
+        ids = params['ids']
+        if isinstance(ids, str):
+            ids = [part for part in ids.split(',') if part.strip()]
+        try:
+            clean['ids'] = sorted({int(student_id) for student_id in ids})
+        except (TypeError, ValueError):
+            raise ValueError('ids must be a list of student ids')
+        clean.pop('semester', None)
+    if kind == 'export':
+        fmt = (params.get('format') or 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(unknown_format_message(fmt))
+        clean['format'] = fmt
+    return clean
+
+# In-process counters of admission decisions
+_counters = {'submitted': 0, 'reused': 0, 'rejected': 0}
+_counters_lock = threading.Lock()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+def submit(conn, kind, params=None):
+    """Queue a job and return its status (see job_status()).
+
+    An identical queued, running or finished job (same kind, parameters and
+    data version), or a queued one of the same kind and parameters, is
+    returned instead of queueing another. Raises ValueError
+    for bad parameters and QueueFull when MAX_QUEUED_JOBS are waiting.
+    """
+    params = clean_params(kind, params or {})
+    prune_jobs(conn)
+    request_key = json.dumps([kind, params, get_data_version(conn)], sort_keys=True)
+    dedup_key = hashlib.sha256(request_key.encode()).hexdigest()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        # Finished jobs are only reused while their file is still there
+        existing = next((
+            (job_id,) for job_id, status, path in conn.execute('''
+                SELECT id, status, result_path FROM jobs
+                WHERE dedup_key = ? AND status IN ('queued', 'running', 'done')
+                ORDER BY id DESC
+            ''', (dedup_key,))
+            if status != 'done' or (path and os.path.exists(path))
+        ), None) or conn.execute('''
+            SELECT id FROM jobs WHERE kind = ? AND params = ? AND status = 'queued' ORDER BY id LIMIT 1
+        ''', (kind, json.dumps(params))).fetchone()
+        if existing is None:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= MAX_QUEUED_JOBS:
+                _count('rejected')
+                raise QueueFull(f'{queued} jobs are already waiting; try again in a minute')
+            cursor = conn.execute('INSERT INTO jobs (kind, params, dedup_key, created_at) VALUES (?, ?, ?, ?)',
+                                  (kind, json.dumps(params), dedup_key, time.time()))
+            job_id = cursor.lastrowid
+    if existing is not None:
+        _count('reused')
+        return job_status(conn, existing[0])
+    _count('submitted')
+    _wakeup.set()
+    return job_status(conn, job_id)
+
+JOB_STATUS_SQL = '''
+    SELECT id, kind, params, status, progress, total, message, error, result_name,
+           created_at, started_at, finished_at
+    FROM jobs WHERE id = ?
+'''
+
+def job_status(conn, job_id):
+    """A job's state as a JSON-ready dict, or None if there is no such job"""
+    row = conn.execute(JOB_STATUS_SQL, (job_id,)).fetchone()
+    if row is None:
+        return None
+    (job_id, kind, params, status, progress, total, message, error, result_name,
+     created_at, started_at, finished_at) = row
+    job = {
+        'id': job_id,
+        'kind': kind,
+        'params': json.loads(params),
+        'status': status,
+        'progress': progress,
+        'total': total,
+        'message': message,
+        'error': error,
+        'created_at': created_at,
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'seconds': (finished_at or time.time()) - started_at if started_at else None,
+        'download': result_name if status == 'done' else None,
+    }
+    if status == 'queued':
+        job['queue_position'] = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id <= ?", (job_id,)).fetchone()[0]
+    return job
+
+def job_result(conn, job_id):
+    """(path, download name, mimetype) of a finished job's file, or None"""
+    row = conn.execute('''
+        SELECT result_path, result_name, mimetype FROM jobs
+        WHERE id = ? AND status = 'done' AND result_path IS NOT NULL
+    ''', (job_id,)).fetchone()
+    if row is None or not os.path.exists(row[0]):
+        return None
+    return row
+
+def list_jobs(conn, limit=20):
+    """The most recent jobs, newest first"""
+    ids = [row[0] for row in conn.execute('SELECT id FROM jobs ORDER BY id DESC LIMIT ?', (limit,))]
+    return [job_status(conn, job_id) for job_id in ids]
+
+def job_stats(conn):
+    """Jobs by status, the admission limits and in-process admission counters"""
+    statuses = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        'workers': JOB_WORKERS,
+        'max_queued': MAX_QUEUED_JOBS,
+        'queued': statuses.get('queued', 0),
+        'running': statuses.get('running', 0),
+        'done': statuses.get('done', 0),
+        'failed': statuses.get('failed', 0),
+        **counters,
+    }
+
+def prune_jobs(conn):
+    """Delete jobs that finished more than JOB_RETENTION ago, with their files"""
+    cutoff = time.time() - JOB_RETENTION
+    rows = conn.execute('''
+        SELECT id, result_path FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?
+    ''', (cutoff,)).fetchall()
+    for _, path in rows:
+        if path and os.path.exists(path):
+            os.remove(path)
+    with conn:
+        conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id, _ in rows])
+    return len(rows)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def requeue_interrupted(conn):
+    """Queue again the running jobs whose worker process is gone; returns how many"""
+    rows = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+    lost = [(job_id,) for job_id, pid in rows if pid is None or not _process_alive(pid)]
+    with conn:
+        conn.executemany('''
+            UPDATE jobs SET status = 'queued', worker_pid = NULL, progress = 0, total = NULL, started_at = NULL
+            WHERE id = ? AND status = 'running'
+        ''', lost)
+    return len(lost)
+
+def claim_next_job(conn):
+    """Mark the oldest queued job as running in this process and return (id, kind), or None"""
+    while True:
+        row = conn.execute("SELECT id, kind FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            return None
+        with conn:
+            claimed = conn.execute('''
+                UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ?
+                WHERE id = ? AND status = 'queued'
+            ''', (os.getpid(), time.time(), row[0])).rowcount
+        if claimed:  # otherwise another worker got there first
+            return row
+
+def _finish(conn, job_id, result=None, error=None):
+    result = result or {}
+    with conn:
+        conn.execute('''
+            UPDATE jobs SET status = ?, finished_at = ?, error = ?, message = COALESCE(?, message),
+                            result_path = ?, result_name = ?, mimetype = ?
+            WHERE id = ? AND status = 'running'
+        ''', ('failed' if error else 'done', time.time(), error, result.get('message'),
+              result.get('path'), result.get('name'), result.get('mimetype'), job_id))
+
+def run_job(job_id, db_path=None):
+    """Run a claimed job to completion, recording progress and the outcome in its row"""
+    conn = connect(db_path)
+    # Progress goes through its own connection, apart from the job's long reads
+    status_conn = connect(db_path)
+    try:
+        kind, params = conn.execute('SELECT kind, params FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        job = {'id': job_id, 'kind': kind, 'params': json.loads(params)}
+        last_write = 0
+
+        def on_progress(done, total, seconds):
+            nonlocal last_write
+            now = time.monotonic()
+            if done == total or now - last_write >= PROGRESS_INTERVAL:
+                last_write = now
+                with status_conn:
+                    status_conn.execute('UPDATE jobs SET progress = ?, total = ? WHERE id = ?',
+                                        (done, total, job_id))
+
+        os.makedirs(JOB_DIR, exist_ok=True)
+        try:
+            result = JOB_KINDS[kind](conn, job, on_progress)
+        except Exception as error:
+            _finish(status_conn, job_id, error=str(error) or type(error).__name__)
+        else:
+            _finish(status_conn, job_id, result)
+    finally:
+        status_conn.close()
+        conn.close()
+
+def _init_job_process():
+    """Job process initializer: let page requests have the CPU first, and use one core"""
+    if hasattr(os, 'nice'):
+        os.nice(JOB_NICENESS)
+    render_in_process()
+
+_job_processes = None
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+def _get_job_processes():
+    """Process pool for report jobs, one process per job worker"""
+    global _job_processes
+    with _workers_lock:
+        if _job_processes is None:
+            _job_processes = process_pool(JOB_WORKERS, initializer=_init_job_process)
+        return _job_processes
+
+def _reset_job_processes():
+    global _job_processes
+    with _workers_lock:
+        broken, _job_processes = _job_processes, None
+    if broken is not None:
+        broken.shutdown(wait=False)
+
+def _work(db_path):
+    """Job worker thread: claim queued jobs one at a time and run them.
+
+    An unexpected error (a locked database, say) fails the job in hand, if
+    any, and the worker carries on with the next one; a failure that cannot
+    be recorded yet is retried on the following turn.
+    """
+    conn = connect(db_path)
+    unrecorded = None  # (job_id, error) of a failed job still marked running
+    while True:
+        job_id = None
+        try:
+            if unrecorded:
+                _finish(conn, unrecorded[0], error=unrecorded[1])
+                unrecorded = None
+            _wakeup.clear()
+            claimed = claim_next_job(conn)
+            if claimed is None:
+                _wakeup.wait(POLL_SECONDS)
+                continue
+            job_id, kind = claimed
+            if kind in IN_PROCESS_KINDS:
+                run_job(job_id, db_path)
+                continue
+            try:
+                _get_job_processes().submit(run_job, job_id, db_path).result()
+            except Exception as error:
+                # The job process died (or the job could not be sent to it)
+                _reset_job_processes()
+                _finish(conn, job_id, error=f'job process failed: {error or type(error).__name__}')
+        except Exception as error:
+            message = str(error) or type(error).__name__
+            print(f"⚠️ Job worker error{f' in job {job_id}' if job_id else ''}: {message}", flush=True)
+            if conn.in_transaction:
+                conn.rollback()
+            if job_id is not None:
+                unrecorded = (job_id, f'job worker error: {message}')
+            time.sleep(ERROR_PAUSE_SECONDS)
+
+def start_workers(db_path=None):
+    """Start this process's job worker threads once, first queueing again any interrupted jobs"""
+    if _workers:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        conn = connect(db_path)
+        requeued = requeue_interrupted(conn)
+        conn.close()
+        if requeued:
+            print(f"🔁 Requeued {requeued} interrupted job(s)")
+        for number in range(JOB_WORKERS):
+            worker = threading.Thread(target=_work, args=(db_path,), name=f'job-worker-{number + 1}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+def main():
+    parser = argparse.ArgumentParser(description='Submit, list or run background report jobs.')
+    parser.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    submit_parser = commands.add_parser('submit', help='queue a job')
+    submit_parser.add_argument('kind', choices=list(JOB_KINDS))
+    submit_parser.add_argument('--semester', type=int)
+    submit_parser.add_argument('--ids', help='comma-separated student ids (cards)')
+    submit_parser.add_argument('--format', choices=list(EXPORT_FORMATS), help='export format')
+    commands.add_parser('list', help='show recent jobs')
+    commands.add_parser('work', help='run job workers until interrupted')
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == 'submit':
+        params = {'semester': args.semester, 'ids': args.ids, 'format': args.format}
+        try:
+            job = submit(conn, args.kind, params)
+        except (ValueError, QueueFull) as error:
+            print(f"❌ {error}")
+            return 1
+        print(f"✅ Job {job['id']} ({job['kind']}) is {job['status']}")
+    elif args.command == 'list':
+        for job in list_jobs(conn):
+            progress = f"{job['progress']}/{job['total']}" if job['total'] else ''
+            print(f"   #{job['id']:<5} {job['kind']:<8} {job['status']:<8} {progress:<12} "
+                  f"{job['error'] or job['message'] or ''}")
+    else:
+        print(f"⚙️ Running {JOB_WORKERS} job worker(s) on {args.db} (Ctrl+C to stop)")
+        start_workers(args.db)
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+    conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
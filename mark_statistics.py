@@ -0,0 +1,167 @@
+"""Distribution statistics over all marks, computed with NumPy.
+
+The marks table is loaded once into a students x subjects float matrix
+(NaN where a mark is missing). Everything else is vectorised over that
+matrix: per-subject mean, standard deviation, quartiles and histograms,
+percentile ranks of each student's percentage, and the subject-to-subject
+correlation matrix.
+"""
+import itertools
+import time
+
+import numpy as np
+
+from cache import VersionMemo
+
+# Histogram bin edges: 0-9, 10-19, ..., 90-100
+HISTOGRAM_EDGES = np.arange(0, 101, 10)
+
+def load_marks_matrix(conn):
+    """Return (student_ids, subjects, matrix) with one row per student who has marks"""
+    cursor = conn.cursor()
+    # One read transaction, so the count matches the rows read after it
+    with conn:
+        cursor.execute('BEGIN')
+        cursor.execute('SELECT id, subject_code, subject_name FROM subjects ORDER BY subject_code')
+        subjects = cursor.fetchall()
+
+        cursor.execute('SELECT COUNT(*) FROM marks WHERE marks IS NOT NULL')
+        count = cursor.fetchone()[0]
+        if not count or not subjects:
+            return np.array([], dtype=np.int64), subjects, np.full((0, len(subjects)), np.nan)
+        cursor.execute('SELECT student_id, subject_id, marks FROM marks WHERE marks IS NOT NULL')
+        flat = np.fromiter(itertools.chain.from_iterable(cursor), dtype=np.int64, count=count * 3)
+    student_col, subject_col, marks_col = flat.reshape(-1, 3).T
+
+    student_ids, rows = np.unique(student_col, return_inverse=True)
+    subject_ids = np.array([subject[0] for subject in subjects], dtype=np.int64)
+    order = np.argsort(subject_ids)
+    columns = order[np.searchsorted(subject_ids, subject_col, sorter=order)]
+    known = subject_ids[columns] == subject_col
+
+    matrix = np.full((len(student_ids), len(subjects)), np.nan)
+    matrix[rows[known], columns[known]] = marks_col[known]
+    return student_ids, subjects, matrix
+
+def percentile_ranks(values):
+    """Percentile rank of every value within the array (mean rank for ties)"""
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side='left')
+    at_or_below = np.searchsorted(ordered, values, side='right')
+    return (below + at_or_below) * 50.0 / len(values) if len(values) else np.array([])
+
+def correlation_matrix(matrix):
+    """Pearson correlation of every subject pair over students who have both marks"""
+    subjects = matrix.shape[1]
+    result = np.eye(subjects)
+    present = ~np.isnan(matrix)
+    for i, j in itertools.combinations(range(subjects), 2):
+        both = present[:, i] & present[:, j]
+        if both.sum() < 2:
+            result[i, j] = result[j, i] = np.nan
+            continue
+        x = matrix[both, i] - matrix[both, i].mean()
+        y = matrix[both, j] - matrix[both, j].mean()
+        denominator = np.sqrt((x * x).sum() * (y * y).sum())
+        result[i, j] = result[j, i] = (x * y).sum() / denominator if denominator else np.nan
+    return result
+
+def _number(value, digits=2):
+    """JSON-friendly float (None for NaN)"""
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+def compute_statistics(conn):
+    """Per-subject distribution stats, percentile ranks and correlations"""
+    started = time.perf_counter()
+    student_ids, subjects, matrix = load_marks_matrix(conn)
+    loaded = time.perf_counter()
+
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=0)
+    has_marks = counts > 0
+    # nan* reductions warn on all-NaN columns, so only reduce columns with marks
+    reduced = matrix[:, has_marks]
+    columns = {
+        'mean': np.full(len(subjects), np.nan),
+        'std': np.full(len(subjects), np.nan),
+        'min': np.full(len(subjects), np.nan),
+        'max': np.full(len(subjects), np.nan),
+    }
+    quartiles = np.full((3, len(subjects)), np.nan)
+    if reduced.size:
+        columns['mean'][has_marks] = np.nanmean(reduced, axis=0)
+        columns['std'][has_marks] = np.nanstd(reduced, axis=0)
+        columns['min'][has_marks] = np.nanmin(reduced, axis=0)
+        columns['max'][has_marks] = np.nanmax(reduced, axis=0)
+        quartiles[:, has_marks] = np.nanpercentile(reduced, [25, 50, 75], axis=0)
+
+    # Histogram of every subject at once: bin index per cell, counted per column
+    bins = np.clip(np.nan_to_num(matrix) // 10, 0, len(HISTOGRAM_EDGES) - 2).astype(np.int64)
+    histograms = np.stack([
+        np.bincount(bins[present[:, i], i], minlength=len(HISTOGRAM_EDGES) - 1)
+        for i in range(len(subjects))
+    ]) if len(subjects) else np.zeros((0, len(HISTOGRAM_EDGES) - 1), dtype=np.int64)
+
+    # Percentage per student over the subjects they have marks in
+    percentages = np.nanmean(matrix, axis=1) if len(student_ids) else np.array([])
+    ranks = percentile_ranks(percentages)
+    correlations = correlation_matrix(matrix)
+    finished = time.perf_counter()
+
+    subject_stats = []
+    for i, (subject_id, code, name) in enumerate(subjects):
+        subject_stats.append({
+            'id': subject_id,
+            'code': code,
+            'name': name,
+            'count': int(counts[i]),
+            'mean': _number(columns['mean'][i]),
+            'std': _number(columns['std'][i]),
+            'min': _number(columns['min'][i], 0),
+            'q1': _number(quartiles[0, i]),
+            'median': _number(quartiles[1, i]),
+            'q3': _number(quartiles[2, i]),
+            'max': _number(columns['max'][i], 0),
+            'histogram': histograms[i].tolist(),
+        })
+
+    return {
+        'students': len(student_ids),
+        'marks': int(counts.sum()),
+        'subjects': subject_stats,
+        'histogram_bins': [f'{low}-{low + 9 if low < 90 else 100}' for low in HISTOGRAM_EDGES[:-1].tolist()],
+        'percentage_percentiles': {
+            str(p): _number(v)
+            for p, v in zip((10, 25, 50, 75, 90, 99),
+                            np.percentile(percentages, [10, 25, 50, 75, 90, 99]) if len(percentages) else [np.nan] * 6)
+        },
+        'correlation': {
+            'subjects': [code for _, code, _ in subjects],
+            'matrix': [[_number(value, 3) for value in row] for row in correlations],
+        },
+        'timings': {
+            'load_seconds': round(loaded - started, 4),
+            'compute_seconds': round(finished - loaded, 4),
+        },
+        # Per-student arrays for lookups; not part of the JSON output
+        '_student_ids': student_ids,
+        '_percentile_ranks': ranks,
+    }
+
+def student_percentile_rank(statistics, student_id):
+    """Percentile rank of one student's percentage, or None if they have no marks"""
+    student_ids = statistics['_student_ids']
+    index = np.searchsorted(student_ids, student_id)
+    if index < len(student_ids) and student_ids[index] == student_id:
+        return _number(statistics['_percentile_ranks'][index])
+    return None
+
+def public_statistics(statistics):
+    """The statistics dict without the per-student arrays"""
+    return {key: value for key, value in statistics.items() if not key.startswith('_')}
+
+_latest = VersionMemo()
+
+def get_statistics(conn, version):
+    """compute_statistics(), recomputed only when the data version changes"""
+    return _latest.get(version, lambda: compute_statistics(conn))
@@ -0,0 +1,28 @@
+"""Keyset paging helpers shared by the paged lists (students, leaderboards).
+
+A page starts after the key of the previous page's last row, carried
+between requests as an opaque cursor: the key's fields joined with ':'.
+Only the last field may contain ':' itself (a name, say), since a cursor
+is split at most len(fields) - 1 times.
+"""
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def page_size(limit):
+    """Rows per page for a requested limit: PAGE_SIZE when missing, at most MAX_PAGE_SIZE"""
+    return max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+
+def encode_cursor(*fields):
+    """Opaque 'next page' token for the key fields of a page's last row"""
+    return ':'.join(str(field) for field in fields)
+
+def decode_cursor(cursor, types):
+    """The key fields of a cursor, each converted by its entry in types; raises ValueError if malformed"""
+    parts = cursor.split(':', len(types) - 1)
+    if len(parts) != len(types):
+        raise ValueError('invalid cursor')
+    try:
+        return tuple(convert(part) for convert, part in zip(types, parts))
+    except ValueError:
+        raise ValueError('invalid cursor')
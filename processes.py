@@ -0,0 +1,12 @@
+"""Process pools for CPU-bound work: card rendering and background jobs."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def process_pool(workers, initializer=None):
+    """A ProcessPoolExecutor of workers processes, each started by initializer().
+
+    Processes come from a forkserver: the web server runs threads (request
+    handlers, job workers), and forking a threaded process is not safe.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                               mp_context=multiprocessing.get_context('forkserver'))
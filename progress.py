@@ -0,0 +1,12 @@
+"""Console progress for long batch runs (card ZIPs, cache warming, booklets)."""
+
+def progress_printer(unit, icon):
+    """An on_progress(done, total, seconds) callback that prints about every 5% of the batch.
+
+    e.g. progress_printer('cards', '📄') prints "📄 500/10000 cards (250.0 cards/sec)".
+    """
+    def print_progress(done, total, seconds):
+        if done == total or done % max(1, total // 20) == 0:
+            rate = done / seconds if seconds else 0
+            print(f"   {icon} {done}/{total} {unit} ({rate:.1f} {unit}/sec)", flush=True)
+    return print_progress
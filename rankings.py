@@ -0,0 +1,143 @@
+"""Class rankings: overall by percentage and per subject by marks.
+
+Ranks follow SQL RANK(): students with equal scores share a rank and the
+next rank skips ahead (1, 2, 2, 4). Leaderboards are paged with keyset
+cursors over the rank indexes, so page N costs the same as page 1, and a
+single student's rank is a count over the index instead of a full sort.
+"""
+from paging import PAGE_SIZE, decode_cursor, encode_cursor, page_size
+
+# Rows of one leaderboard page. The window runs over the page only (the
+# LIMIT is applied first); page_rank is turned into the class rank using
+# the position carried in the cursor.
+OVERALL_PAGE_SQL = '''
+    SELECT student_id, roll_no, name, percentage, total_marks, grade,
+           RANK() OVER (ORDER BY percentage DESC) AS page_rank
+    FROM (
+        SELECT r.student_id, s.roll_no, s.name, r.percentage, r.total_marks, r.grade
+        FROM student_results r
+        JOIN students s ON s.id = r.student_id
+        WHERE r.percentage <= :score AND NOT (r.percentage = :score AND r.student_id <= :student_id)
+        ORDER BY r.percentage DESC, r.student_id
+        LIMIT :limit
+    )
+    ORDER BY percentage DESC, student_id
+'''
+
+SUBJECT_PAGE_SQL = '''
+    SELECT student_id, roll_no, name, marks, page_rank
+    FROM (
+        SELECT student_id, roll_no, name, marks,
+               RANK() OVER (ORDER BY marks DESC) AS page_rank
+        FROM (
+            SELECT m.student_id, s.roll_no, s.name, m.marks
+            FROM marks m
+            JOIN students s ON s.id = m.student_id
+            WHERE m.subject_id = :subject_id AND m.marks IS NOT NULL
+              AND m.marks <= :score AND NOT (m.marks = :score AND m.student_id <= :student_id)
+            ORDER BY m.marks DESC, m.student_id
+            LIMIT :limit
+        )
+    )
+    ORDER BY marks DESC, student_id
+'''
+
+def _class_ranks(rows, score_of, last_score, position, last_rank):
+    """Class rank of each page row from its page_rank and the previous page's last row"""
+    ranks = []
+    for row in rows:
+        if score_of(row) == last_score:
+            ranks.append(last_rank)  # tied with the end of the previous page
+        else:
+            ranks.append(position + row['page_rank'])
+    return ranks
+
+def leaderboard(conn, after=None, limit=PAGE_SIZE, subject_id=None):
+    """One page of the overall (or one subject's) leaderboard.
+
+    Returns {'rows': [...], 'next': cursor or None}. Pass 'next' back as
+    after= for the following page. Raises ValueError for a bad cursor.
+    """
+    # Cursor: (score, student_id) of the previous page's last row, its position and class rank
+    if after:
+        score, student_id, position, rank = decode_cursor(after, (float, int, int, int))
+    else:
+        score, student_id, position, rank = float('inf'), 0, 0, 0
+    limit = page_size(limit)
+    params = {'score': score, 'student_id': student_id, 'limit': limit, 'subject_id': subject_id}
+    cursor = conn.cursor()
+    if subject_id is None:
+        cursor.execute(OVERALL_PAGE_SQL, params)
+        score_column = 'percentage'
+    else:
+        cursor.execute(SUBJECT_PAGE_SQL, params)
+        score_column = 'marks'
+    columns = [description[0] for description in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    ranks = _class_ranks(rows, lambda row: row[score_column], score, position, rank)
+    for row, class_rank in zip(rows, ranks):
+        row['rank'] = class_rank
+        del row['page_rank']
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[score_column], last['student_id'], position + len(rows), last['rank'])
+    return {'rows': rows, 'next': next_cursor}
+
+def student_rank(conn, student_id):
+    """Overall rank of one student, or None if they have no marks"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT percentage FROM student_results WHERE student_id = ?', (student_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    percentage = row[0]
+    # Both counts are ranges over idx_student_results_percentage
+    cursor.execute('SELECT COUNT(*) FROM student_results WHERE percentage > ?', (percentage,))
+    ahead = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM student_results')
+    ranked = cursor.fetchone()[0]
+    return {'rank': ahead + 1, 'out_of': ranked, 'percentage': percentage}
+
+def class_ranks(conn, percentages):
+    """Overall rank for each of several percentages, as {percentage: student_rank()-style dict}.
+
+    One pass over idx_student_results_percentage counting each distinct
+    percentage, instead of a count per student; for batches of students.
+    """
+    wanted = set(percentages)
+    ranks = {}
+    ahead = 0
+    cursor = conn.cursor()
+    cursor.execute('SELECT percentage, COUNT(*) FROM student_results GROUP BY percentage ORDER BY percentage DESC')
+    counts = cursor.fetchall()
+    ranked = sum(count for _, count in counts)
+    for percentage, count in counts:
+        if percentage in wanted:
+            ranks[percentage] = {'rank': ahead + 1, 'out_of': ranked, 'percentage': percentage}
+        ahead += count
+    return ranks
+
+def subject_ranks(conn, student_id):
+    """Rank of one student in each subject they have a mark for.
+
+    Counted from mark_histogram (at most 101 rows per subject), so the
+    cost does not depend on class size.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT s.id, s.subject_code, s.subject_name, m.marks,
+               1 + (SELECT COALESCE(SUM(h.n), 0) FROM mark_histogram h
+                    WHERE h.subject_id = m.subject_id AND h.marks > m.marks),
+               (SELECT SUM(h.n) FROM mark_histogram h WHERE h.subject_id = m.subject_id)
+        FROM marks m
+        JOIN subjects s ON s.id = m.subject_id
+        WHERE m.student_id = ? AND m.marks IS NOT NULL
+        ORDER BY s.subject_code
+    ''', (student_id,))
+    return [
+        {'subject_id': subject_id, 'code': code, 'name': name, 'marks': marks, 'rank': rank, 'out_of': out_of}
+        for subject_id, code, name, marks, rank, out_of in cursor.fetchall()
+    ]
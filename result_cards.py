@@ -0,0 +1,708 @@
+"""PDF result cards: data lookup, rendering, caching and batch rendering.
+
+fetch_card() reads everything a card shows into a plain dict, keyed by a
+hash of that content; the publication date follows a narrower hash of the
+student's details and marks alone, so class ranks moving does not re-date
+anyone's card. render_card() turns the dict into PDF bytes without
+touching the database, so cards can be laid out in worker processes on
+every core. Rendered cards are kept in a content-addressed disk cache, so a
+card is only laid out again when what it shows changes. iter_zip() streams
+a whole class of cards into a ZIP archive as they finish.
+
+Usage:
+    python result_cards.py cards.zip [--semester 5 | --students 1 2 3]
+    python result_cards.py --warm [--semester 5]    # fill the cache ahead of result day
+"""
+import argparse
+import atexit
+import datetime
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
+
+from cache import DiskCache
+from database import DB_PATH, connect
+from processes import process_pool
+from progress import progress_printer
+from rankings import student_rank
+
+# Grade letter (as stored in student_results) -> label, page colour, PDF colour
+GRADES = {
+    'O': ('O (Outstanding)', '#FFD700', colors.gold),
+    'A+': ('A+ (Excellent)', '#4CAF50', colors.green),
+    'A': ('A (Very Good)', '#2196F3', colors.blue),
+    'B+': ('B+ (Good)', '#9C27B0', colors.purple),
+    'B': ('B (Above Average)', '#FF9800', colors.orange),
+    'C': ('C (Average)', '#795548', colors.brown),
+    'P': ('P (Pass)', '#607D8B', colors.grey),
+    'F': ('F (Fail)', '#F44336', colors.red),
+}
+
+# Student details joined with the maintained result summary
+STUDENT_RESULT_SQL = '''
+    SELECT st.roll_no, st.name, st.semester,
+           r.total_marks, r.subject_count, r.percentage, r.grade, r.passed
+    FROM students st
+    LEFT JOIN student_results r ON r.student_id = st.id
+    WHERE st.id = ?
+'''
+
+SUBJECT_MARKS_SQL = '''
+    SELECT s.subject_code, s.subject_name, m.marks
+    FROM marks m
+    JOIN subjects s ON m.subject_id = s.id
+    WHERE m.student_id = ?
+    ORDER BY s.subject_code
+'''
+
+# Card renderer: 'platypus' (flow layout) or 'canvas' (fixed layout drawn
+# directly, several times faster; see render_card_canvas)
+CARD_RENDERER = os.environ.get('BCA_CARD_RENDERER', 'platypus')
+
+# Rendered cards by content hash; bump CARD_LAYOUT_VERSION whenever
+# render_card() output changes so old files are not served
+PDF_CACHE_DIR = os.environ.get('BCA_PDF_CACHE', 'pdf_cache')
+CARD_LAYOUT_VERSION = 1
+card_cache = DiskCache(PDF_CACHE_DIR, name='pdfs', suffix='.pdf')
+
+# Worker processes for batch rendering, and in-flight cards per worker
+# (bounds memory while keeping every worker busy)
+WORKERS = os.cpu_count() or 1
+QUEUE_DEPTH = 4
+
+# The student's own result on a card; only a change here is a new publication
+PUBLISHED_FIELDS = ('student_id', 'roll_no', 'name', 'semester', 'total_marks',
+                    'percentage', 'grade', 'passed', 'marks')
+
+def content_hash(card):
+    """sha256 of a card's student details and marks; recorded in result_publications"""
+    content = [card[field] for field in PUBLISHED_FIELDS]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+def card_key(card):
+    """sha256 of everything a card's PDF shows, rank and renderer included; the cache key and ETag"""
+    content = [CARD_LAYOUT_VERSION, CARD_RENDERER, card['content_hash'], card['published_at'],
+               card['subject_total'], card['rank']]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+# Only a changed hash moves the date; a concurrent first publish keeps the earlier one
+PUBLISH_SQL = '''
+    INSERT INTO result_publications (student_id, content_hash, published_at) VALUES (?, ?, ?)
+    ON CONFLICT (student_id) DO UPDATE
+    SET content_hash = excluded.content_hash, published_at = excluded.published_at
+    WHERE content_hash != excluded.content_hash
+'''
+
+def publication_date():
+    """Now, as published_at is stored ('dd-mm-YYYY HH:MM' local time)"""
+    return datetime.datetime.now().strftime('%d-%m-%Y %H:%M')
+
+def record_publications(conn, publications):
+    """Record (student_id, content_hash, published_at) rows in one transaction"""
+    with conn:
+        conn.executemany(PUBLISH_SQL, publications)
+
+def publish(conn, student_id, key):
+    """Publication date of this content hash, recorded the first time it is seen.
+
+    Usually the content is already recorded and this is a single read.
+    """
+    row = conn.execute('SELECT content_hash, published_at FROM result_publications WHERE student_id = ?',
+                       (student_id,)).fetchone()
+    if row is not None and row[0] == key:
+        return row[1]
+    record_publications(conn, [(student_id, key, publication_date())])
+    return conn.execute('SELECT published_at FROM result_publications WHERE student_id = ?',
+                        (student_id,)).fetchone()[0]
+
+def count_subjects(conn):
+    """Number of subjects a student can have marks in"""
+    return conn.execute('SELECT COUNT(*) FROM subjects').fetchone()[0]
+
+def fetch_card(conn, student_id):
+    """Everything a result card shows, or None if the student has no marks.
+
+    Includes 'content_hash', 'published_at' and 'key' (the PDF's cache key).
+    """
+    cursor = conn.cursor()
+    cursor.execute(STUDENT_RESULT_SQL, (student_id,))
+    student = cursor.fetchone()
+    if not student:
+        return None
+    cursor.execute(SUBJECT_MARKS_SQL, (student_id,))
+    marks = cursor.fetchall()
+    if not marks:
+        return None
+    roll_no, name, semester, total_marks, subject_count, percentage, grade, passed = student
+    card = {
+        'student_id': student_id,
+        'roll_no': roll_no,
+        'name': name,
+        'semester': semester,
+        'total_marks': total_marks,
+        'percentage': percentage,
+        'grade': grade,
+        'passed': passed,
+        'marks': [list(row) for row in marks],
+        'subject_total': count_subjects(conn),
+        'rank': student_rank(conn, student_id),
+    }
+    card['content_hash'] = content_hash(card)
+    card['published_at'] = publish(conn, student_id, card['content_hash'])
+    card['key'] = card_key(card)
+    return card
+
+# (content hash, published_at) of cards seen at the current data version
+_validators = {'version': None, 'cards': {}}
+_validators_lock = threading.Lock()
+
+def known_card_validators(student_id, version):
+    """(key, published_at) of a student's card if it was fetched at this data version, else None.
+
+    Lets a download be revalidated without fetch_card(): while the data
+    version stands still, no card can have changed.
+    """
+    with _validators_lock:
+        if _validators['version'] == version:
+            return _validators['cards'].get(student_id)
+    return None
+
+def remember_card_validators(student_id, version, card):
+    """Note a freshly fetched card's validators for known_card_validators(); returns them"""
+    validators = (card['key'], card['published_at'])
+    with _validators_lock:
+        if _validators['version'] != version:
+            _validators['version'] = version
+            _validators['cards'] = {}
+        _validators['cards'][student_id] = validators
+    return validators
+
+def published_timestamp(published_at):
+    """Unix time of a card's publication date (stored as local 'dd-mm-YYYY HH:MM')"""
+    return datetime.datetime.strptime(published_at, '%d-%m-%Y %H:%M').timestamp()
+
+def card_filename(card):
+    """Download name for a card, e.g. Result_Aarav_Sharma.pdf"""
+    return f"Result_{card['name'].replace(' ', '_')}.pdf"
+
+def cards_zip_filename(semester=None):
+    """Download name for a ZIP of cards, e.g. Result_Cards_Sem5.zip"""
+    return f'Result_Cards_Sem{semester}.zip' if semester is not None else 'Result_Cards.zip'
+
+def render_card(card):
+    """Render one result card with the configured renderer and return the PDF bytes"""
+    return RENDERERS[CARD_RENDERER](card)
+
+def render_card_platypus(card):
+    """Lay out one result card with platypus and return the PDF bytes"""
+    marks = card['marks']
+    grade = GRADES[card['grade']][0]
+
+    # Create PDF in memory (invariant: no creation time or random id, so same card, same bytes)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=1,
+                          rightMargin=72, leftMargin=72,
+                          topMargin=72, bottomMargin=72)
+
+    # Create styles
+    styles = getSampleStyleSheet()
+
+    # Custom styles
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    header_style = ParagraphStyle(
+        'CustomHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=12
+    )
+
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=6
+    )
+
+    # Build PDF content
+    story = []
+
+    # Title
+    story.append(Paragraph("🎓 ALPINE COLLEGE OF EDUCATION", title_style))
+    story.append(Paragraph("BCA 5th Semester - Result Card", styles['Heading2']))
+    story.append(Spacer(1, 20))
+
+    # Student Information
+    story.append(Paragraph(f"<b>Student Name:</b> {card['name']}", normal_style))
+    story.append(Paragraph(f"<b>Roll Number:</b> {card['roll_no']}", normal_style))
+    story.append(Paragraph(f"<b>Semester:</b> {card['semester']}", normal_style))
+    story.append(Paragraph(f"<b>Published On:</b> {card['published_at']}", normal_style))
+    story.append(Spacer(1, 20))
+
+    # Marks Table
+    story.append(Paragraph("<b>Subject-wise Marks:</b>", header_style))
+
+    # Table data
+    table_data = [['Subject Code', 'Subject Name', 'Marks Obtained', 'Max Marks']]
+    for subject_code, subject_name, mark in marks:
+        table_data.append([subject_code, subject_name, str(mark), '100'])
+
+    # Create table
+    marks_table = Table(table_data, colWidths=[1.5*inch, 3*inch, 1.5*inch, 1.2*inch])
+    marks_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]),
+    ]))
+
+    story.append(marks_table)
+    story.append(Spacer(1, 30))
+
+    # Result Summary
+    story.append(Paragraph("<b>Result Summary:</b>", header_style))
+
+    summary_data = [
+        ['Total Subjects', f"{len(marks)} out of {card['subject_total']}"],
+        ['Total Marks Obtained', f"{card['total_marks']} / {len(marks) * 100}"],
+        ['Percentage', f"{card['percentage']:.2f}%"],
+        ['Grade', grade],
+        ['Class Rank', f"{card['rank']['rank']} out of {card['rank']['out_of']}"],
+        ['Status', 'PASS' if card['passed'] else 'FAIL']
+    ]
+
+    summary_table = Table(summary_data, colWidths=[2.5*inch, 3*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ]))
+
+    story.append(summary_table)
+    story.append(Spacer(1, 30))
+
+    # Footer
+    story.append(Paragraph("<i>This is a computer-generated result card. No signature required.</i>",
+                          ParagraphStyle('Footer', parent=styles['Italic'], fontSize=9, textColor=colors.grey)))
+    story.append(Paragraph("<i>© Alpine College of Education - BCA Department</i>",
+                          ParagraphStyle('Footer', parent=styles['Italic'], fontSize=9, textColor=colors.grey)))
+
+    # Build PDF
+    doc.build(story)
+
+    return buffer.getvalue()
+
+# Fixed geometry of the card for the canvas renderer, matching the platypus
+# layout on a letter page (tables are centred in the 72pt-margin frame)
+PAGE_WIDTH, PAGE_HEIGHT = letter
+TEXT_LEFT = 78
+INFO_FIELDS = (('Student Name:', 'name', 607), ('Roll Number:', 'roll_no', 589),
+               ('Semester:', 'semester', 571), ('Published On:', 'published_at', 553))
+INFO_VALUE_X = {label: TEXT_LEFT + stringWidth(label, 'Helvetica-Bold', 11) + stringWidth(' ', 'Helvetica', 11)
+                for label, _, _ in INFO_FIELDS}
+MARKS_COLUMNS = (1.5*inch, 3*inch, 1.5*inch, 1.2*inch)
+MARKS_LEFT = TEXT_LEFT + (456 - sum(MARKS_COLUMNS)) / 2
+MARKS_HEADER_BOTTOM = 457  # header row is 27pt tall, data rows 18pt
+SUMMARY_COLUMNS = (2.5*inch, 3*inch)
+SUMMARY_LEFT = TEXT_LEFT + (456 - sum(SUMMARY_COLUMNS)) / 2
+SUMMARY_TOP = 295
+SUMMARY_LABELS = ('Total Subjects', 'Total Marks Obtained', 'Percentage', 'Grade', 'Class Rank', 'Status')
+# The summary block (heading, table and footer) sits below room for this many
+# marks rows; each further row moves it down 18pt, and once its footer would
+# pass PAGE_BOTTOM it moves to the top of a second page instead
+FRAME_SUBJECTS = 6
+FOOTER_BASELINE = 124
+PAGE_BOTTOM = 36
+SUMMARY_PAGE_SHIFT = 690 - 311  # 'Result Summary:' heading to where the college name is
+# Most marks rows that fit on the first page; cards with more use the platypus renderer
+CANVAS_MAX_SUBJECTS = (MARKS_HEADER_BOTTOM - PAGE_BOTTOM) // 18
+
+def _draw_grid(c, left, columns, top, bottom):
+    """1pt black cell borders for a block of rows"""
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    x = left
+    for width in (0,) + columns:
+        x += width
+        c.line(x, top, x, bottom)
+
+def _draw_card_frame(c):
+    """Everything above the marks rows that is the same on every card: titles, labels, table header"""
+    c.setFillColor(colors.HexColor('#2c3e50'))
+    c.setFont('Helvetica-Bold', 24)
+    c.drawCentredString(PAGE_WIDTH / 2, 690, "🎓 ALPINE COLLEGE OF EDUCATION")
+    c.setFillColor(colors.black)
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(TEXT_LEFT, 648, "BCA 5th Semester - Result Card")
+
+    c.setFont('Helvetica-Bold', 11)
+    for label, _, baseline in INFO_FIELDS:
+        c.drawString(TEXT_LEFT, baseline, label)
+
+    c.setFillColor(colors.HexColor('#34495e'))
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(TEXT_LEFT, 500, "Subject-wise Marks:")
+
+    # Marks table header row
+    width = sum(MARKS_COLUMNS)
+    c.setFillColor(colors.HexColor('#2c3e50'))
+    c.rect(MARKS_LEFT, MARKS_HEADER_BOTTOM, width, 27, stroke=0, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont('Helvetica-Bold', 12)
+    x = MARKS_LEFT
+    for heading, column in zip(('Subject Code', 'Subject Name', 'Marks Obtained', 'Max Marks'), MARKS_COLUMNS):
+        c.drawCentredString(x + column / 2, MARKS_HEADER_BOTTOM + 12, heading)
+        x += column
+
+def _draw_summary_frame(c):
+    """The fixed part of the summary block: heading, table labels and grid, footer"""
+    c.setFillColor(colors.HexColor('#34495e'))
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(TEXT_LEFT, 311, "Result Summary:")
+
+    # Summary table: backgrounds, labels and grid never change
+    width = sum(SUMMARY_COLUMNS)
+    bottom = SUMMARY_TOP - 18 * len(SUMMARY_LABELS)
+    c.setFillColor(colors.lightgrey)
+    c.rect(SUMMARY_LEFT, bottom, width, SUMMARY_TOP - 18 - bottom, stroke=0, fill=1)
+    c.setFillColor(colors.HexColor('#3498db'))
+    c.rect(SUMMARY_LEFT, SUMMARY_TOP - 18, width, 18, stroke=0, fill=1)
+    for row, label in enumerate(SUMMARY_LABELS):
+        c.setFillColor(colors.white if row == 0 else colors.black)
+        c.setFont('Helvetica-Bold' if row == 0 else 'Helvetica', 12)
+        c.drawString(SUMMARY_LEFT + 6, SUMMARY_TOP - 18 * (row + 1) + 3, label)
+    _draw_grid(c, SUMMARY_LEFT, SUMMARY_COLUMNS, SUMMARY_TOP, bottom)
+    for row in range(len(SUMMARY_LABELS) + 1):
+        c.line(SUMMARY_LEFT, SUMMARY_TOP - 18 * row, SUMMARY_LEFT + width, SUMMARY_TOP - 18 * row)
+
+    c.setFillColor(colors.grey)
+    c.setFont('Helvetica-Oblique', 9)
+    c.drawString(TEXT_LEFT, 142, "This is a computer-generated result card. No signature required.")
+    c.drawString(TEXT_LEFT, FOOTER_BASELINE, "© Alpine College of Education - BCA Department")
+
+# Static parts of a card, as form XObjects: the top of the page and the summary block
+CARD_FORMS = (('card_frame', _draw_card_frame), ('card_summary', _draw_summary_frame))
+
+def define_card_frame(c):
+    """Draw the static card parts into a canvas's document as the CARD_FORMS form XObjects.
+
+    Each page then places them with doForm(); a booklet defines them once
+    for all of its pages.
+    """
+    for name, draw in CARD_FORMS:
+        c.beginForm(name)
+        draw(c)
+        c.endForm()
+
+def draw_card_page(c, card):
+    """Draw one card from the current page on: the frame forms, then the card's own values.
+
+    Cards with more than FRAME_SUBJECTS subjects push the summary block
+    down, or onto a second page. Raises ValueError for more marks rows
+    than fit on a page (CANVAS_MAX_SUBJECTS).
+    """
+    marks = card['marks']
+    if len(marks) > CANVAS_MAX_SUBJECTS:
+        raise ValueError(f'a canvas result card fits at most {CANVAS_MAX_SUBJECTS} subjects, not {len(marks)}')
+    c.doForm('card_frame')
+
+    c.setFillColor(colors.black)
+    c.setFont('Helvetica', 11)
+    for label, field, baseline in INFO_FIELDS:
+        c.drawString(INFO_VALUE_X[label], baseline, str(card[field]))
+
+    # Marks rows: alternating backgrounds, centred text, grid
+    width = sum(MARKS_COLUMNS)
+    bottom = MARKS_HEADER_BOTTOM - 18 * len(marks)
+    for row, mark_row in enumerate(marks):
+        row_bottom = MARKS_HEADER_BOTTOM - 18 * (row + 1)
+        c.setFillColor(colors.white if row % 2 == 0 else colors.whitesmoke)
+        c.rect(MARKS_LEFT, row_bottom, width, 18, stroke=0, fill=1)
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica', 10)
+        x = MARKS_LEFT
+        for value, column in zip((mark_row[0], mark_row[1], str(mark_row[2]), '100'), MARKS_COLUMNS):
+            c.drawCentredString(x + column / 2, row_bottom + 5, value)
+            x += column
+    _draw_grid(c, MARKS_LEFT, MARKS_COLUMNS, MARKS_HEADER_BOTTOM + 27, bottom)
+    for row_top in [MARKS_HEADER_BOTTOM + 27] + [MARKS_HEADER_BOTTOM - 18 * row for row in range(len(marks) + 1)]:
+        c.line(MARKS_LEFT, row_top, MARKS_LEFT + width, row_top)
+
+    # Summary block, moved down past any extra marks rows
+    shift = -18 * max(0, len(marks) - FRAME_SUBJECTS)
+    if FOOTER_BASELINE + shift < PAGE_BOTTOM:
+        c.showPage()
+        shift = SUMMARY_PAGE_SHIFT
+    c.saveState()
+    c.translate(0, shift)
+    c.doForm('card_summary')
+    values = (
+        f"{len(marks)} out of {card['subject_total']}",
+        f"{card['total_marks']} / {len(marks) * 100}",
+        f"{card['percentage']:.2f}%",
+        GRADES[card['grade']][0],
+        f"{card['rank']['rank']} out of {card['rank']['out_of']}",
+        'PASS' if card['passed'] else 'FAIL',
+    )
+    x = SUMMARY_LEFT + SUMMARY_COLUMNS[0] + 6
+    for row, value in enumerate(values):
+        c.setFillColor(colors.white if row == 0 else colors.black)
+        c.setFont('Helvetica-Bold' if row == 0 else 'Helvetica', 12)
+        c.drawString(x, SUMMARY_TOP - 18 * (row + 1) + 3, value)
+    c.restoreState()
+
+def render_card_canvas(card):
+    """Draw one result card with the low-level canvas API and return the PDF bytes.
+
+    The static frame is drawn at fixed positions as form XObjects and the
+    card's variable fields are written on top, skipping stylesheet
+    construction and platypus flow layout entirely. Cards with more
+    subjects than the fixed layout holds are laid out by platypus instead.
+    """
+    if len(card['marks']) > CANVAS_MAX_SUBJECTS:
+        return render_card_platypus(card)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
+    define_card_frame(c)
+    draw_card_page(c, card)
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+RENDERERS = {
+    'platypus': render_card_platypus,
+    'canvas': render_card_canvas,
+}
+
+def store_card_pdf(conn, card, pdf):
+    """Cache a rendered card, deleting the file cached for the student before it.
+
+    result_publications.card_key names each student's cached file, so the
+    cache holds about one card per student however often ranks move.
+    """
+    card_cache.put(card['key'], pdf)
+    row = conn.execute('SELECT card_key FROM result_publications WHERE student_id = ?',
+                       (card['student_id'],)).fetchone()
+    if row is None or row[0] == card['key']:
+        return
+    with conn:
+        conn.execute('UPDATE result_publications SET card_key = ? WHERE student_id = ?',
+                     (card['key'], card['student_id']))
+    if row[0]:
+        card_cache.delete(row[0])
+
+def card_pdf(conn, card):
+    """PDF bytes for a fetched card, from the cache or rendered and stored"""
+    pdf = card_cache.get(card['key'])
+    if pdf is None:
+        pdf = render_card(card)
+        store_card_pdf(conn, card, pdf)
+    return pdf
+
+def select_students(conn, semester=None, student_ids=None):
+    """IDs of students with results, in roll number order, by semester or from a list"""
+    sql = '''
+        SELECT st.id FROM students st
+        JOIN student_results r ON r.student_id = st.id
+    '''
+    params = ()
+    if student_ids is not None:
+        sql += f" WHERE st.id IN ({', '.join('?' * len(student_ids))})"
+        params = tuple(student_ids)
+    elif semester is not None:
+        sql += ' WHERE st.semester = ?'
+        params = (semester,)
+    sql += ' ORDER BY st.roll_no'
+    return [row[0] for row in conn.execute(sql, params)]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Shared process pool with one worker per core, started on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = process_pool(WORKERS)
+            atexit.register(_executor.shutdown)
+        return _executor
+
+def render_in_process():
+    """Render batches in this process from now on instead of on the shared pool.
+
+    For processes that are themselves pool workers (background jobs): a
+    single rendering thread overlaps with reading card data without
+    starting a nested process pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1)
+            atexit.register(_executor.shutdown)
+
+def render_cards(conn, student_ids, on_progress=None):
+    """Yield (card, pdf_bytes) for each student, in the order rendering finishes.
+
+    Card data is read here; cached cards are yielded straight away and the
+    rest are laid out on the shared process pool, with at most QUEUE_DEPTH
+    cards per worker in flight, then stored in the cache. on_progress(done,
+    total, seconds) is called after every card.
+    """
+    started = time.perf_counter()
+    pending = {}
+    done = 0
+    ids = iter(student_ids)
+    exhausted = False
+
+    def finished_card():
+        nonlocal done
+        done += 1
+        if on_progress:
+            on_progress(done, len(student_ids), time.perf_counter() - started)
+
+    while pending or not exhausted:
+        while not exhausted and len(pending) < QUEUE_DEPTH * WORKERS:
+            student_id = next(ids, None)
+            if student_id is None:
+                exhausted = True
+                break
+            card = fetch_card(conn, student_id)
+            if card is None:
+                continue
+            pdf = card_cache.get(card['key'])
+            if pdf is not None:
+                finished_card()
+                yield card, pdf
+                continue
+            pending[get_executor().submit(render_card, card)] = card
+        if not pending:
+            break
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            card = pending.pop(future)
+            pdf = future.result()
+            store_card_pdf(conn, card, pdf)
+            finished_card()
+            yield card, pdf
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def iter_zip(conn, student_ids, on_progress=None):
+    """Yield a ZIP archive of result cards chunk by chunk, a card at a time.
+
+    The archive ends with summary.txt giving the card count and cards/sec.
+    """
+    sink = _ChunkSink()
+    started = time.perf_counter()
+    count = 0
+    # PDF page streams are already compressed
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for card, pdf in render_cards(conn, student_ids, on_progress):
+            archive.writestr(f"{card['roll_no']}_{card_filename(card)}", pdf)
+            count += 1
+            yield sink.take()
+        elapsed = time.perf_counter() - started
+        archive.writestr('summary.txt', (
+            f"Result cards: {count}\n"
+            f"Time: {elapsed:.2f}s\n"
+            f"Throughput: {count / elapsed if elapsed else 0:.1f} cards/sec\n"
+        ))
+    yield sink.take()
+
+print_progress = progress_printer('cards', '📄')
+
+def warm_cache(conn, student_ids, prune=False):
+    """Render every card that is not cached yet; returns (cards, rendered, pruned)"""
+    writes_before = card_cache.writes
+    keys = [card['key'] for card, _ in render_cards(conn, student_ids, on_progress=print_progress)]
+    pruned = card_cache.prune(keys) if prune else 0
+    return len(keys), card_cache.writes - writes_before, pruned
+
+def main():
+    parser = argparse.ArgumentParser(description='Render result cards for a class into a ZIP of PDFs.')
+    parser.add_argument('output', nargs='?', help='ZIP file to write')
+    parser.add_argument('--warm', action='store_true',
+                        help=f'render missing cards into the cache ({PDF_CACHE_DIR}/) instead of a ZIP')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--semester', type=int, help='every student of this semester')
+    group.add_argument('--students', type=int, nargs='+', metavar='ID', help='these student ids')
+    parser.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    args = parser.parse_args()
+    if not args.output and not args.warm:
+        parser.error('give a ZIP file to write, or --warm')
+
+    conn = connect(args.db)
+    student_ids = select_students(conn, args.semester, args.students)
+    if not student_ids:
+        print("❌ No students with results match")
+        return 1
+    if args.warm:
+        print(f"🔥 Pre-rendering {len(student_ids)} result cards into {PDF_CACHE_DIR}/")
+        started = time.perf_counter()
+        # Stale files are only removed after warming every student
+        everyone = args.semester is None and args.students is None
+        cards, rendered, pruned = warm_cache(conn, student_ids, prune=everyone)
+        print(f"✅ {cards} cards cached ({rendered} rendered, {cards - rendered} already up to date, "
+              f"{pruned} stale removed) in {time.perf_counter() - started:.2f}s")
+        conn.close()
+        return 0
+    print(f"📦 Rendering {len(student_ids)} result cards on {WORKERS} worker process(es)")
+    started = time.perf_counter()
+    with open(args.output, 'wb') as f:
+        for chunk in iter_zip(conn, student_ids, on_progress=print_progress):
+            f.write(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {args.output} in {elapsed:.2f}s ({len(student_ids) / elapsed:.1f} cards/sec)")
+    conn.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Student results and the class analysis as plain dicts.
+
+The result page, the analysis page and the JSON API all read from here, so
+they always show the same numbers. fetch_results() looks up any number of
+students in one query: the ids go in as a single JSON array expanded by
+json_each(), each student is read by primary key and their marks through
+idx_marks_student_subject.
+"""
+import itertools
+import json
+
+from analytics import compute_analytics
+from mark_statistics import get_statistics
+from rankings import class_ranks, leaderboard, student_rank
+
+# Fields of a result, in output order
+RESULT_FIELDS = ('id', 'roll_no', 'name', 'semester', 'total_marks', 'subject_count',
+                 'percentage', 'grade', 'passed', 'marks', 'rank')
+
+# Most students one batch lookup may ask for
+MAX_BATCH = 1000
+
+RESULTS_SQL = '''
+    SELECT st.id, st.roll_no, st.name, st.semester,
+           r.total_marks, r.subject_count, r.percentage, r.grade, r.passed,
+           s.subject_code, s.subject_name, m.marks
+    FROM json_each(?) ids
+    CROSS JOIN students st ON st.id = ids.value
+    LEFT JOIN student_results r ON r.student_id = st.id
+    LEFT JOIN marks m ON m.student_id = st.id
+    LEFT JOIN subjects s ON s.id = m.subject_id
+    ORDER BY ids.key, s.subject_code
+'''
+
+def parse_fields(text, allowed=RESULT_FIELDS):
+    """Field names from a comma-separated list (None or '' for all); raises ValueError for unknown ones"""
+    if not text:
+        return None
+    fields = [field.strip() for field in text.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"unknown field(s) {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return fields
+
+def select_fields(row, fields):
+    """row with only the given fields (and always its id); all of it for None"""
+    if fields is None:
+        return row
+    return {key: value for key, value in row.items() if key == 'id' or key in fields}
+
+def fetch_results(conn, student_ids, fields=None):
+    """Results of several students in one query, in the order asked for.
+
+    Students that do not exist are left out; students without marks have
+    empty marks and None totals. fields limits what each result holds.
+    """
+    student_ids = list(dict.fromkeys(student_ids))  # drop repeats, keep order
+    if len(student_ids) > MAX_BATCH:
+        raise ValueError(f'at most {MAX_BATCH} students per request')
+    rows = conn.execute(RESULTS_SQL, (json.dumps(student_ids),))
+    results = []
+    for student_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+        group = list(group)
+        _, roll_no, name, semester, total_marks, subject_count, percentage, grade, passed = group[0][:9]
+        result = {
+            'id': student_id,
+            'roll_no': roll_no,
+            'name': name,
+            'semester': semester,
+            'total_marks': total_marks,
+            'subject_count': subject_count,
+            'percentage': percentage,
+            'grade': grade,
+            'passed': None if passed is None else bool(passed),
+            'marks': [{'code': code, 'name': subject_name, 'marks': marks}
+                      for *_, code, subject_name, marks in group if code is not None],
+        }
+        results.append(result)
+
+    if fields is None or 'rank' in fields:
+        if len(results) == 1:
+            results[0]['rank'] = student_rank(conn, results[0]['id'])
+        else:
+            ranks = class_ranks(conn, [result['percentage'] for result in results])
+            for result in results:
+                result['rank'] = ranks.get(result['percentage'])
+    return [select_fields(result, fields) for result in results]
+
+def fetch_result(conn, student_id, fields=None):
+    """One student's result (see fetch_results), or None if there is no such student"""
+    results = fetch_results(conn, [student_id], fields)
+    return results[0] if results else None
+
+def analysis_summary(conn, version):
+    """Everything the analysis page shows: overall, subject and grade figures,
+    the top 5 students and the distribution statistics for this data version"""
+    summary = compute_analytics(conn)
+    summary['top_students'] = leaderboard(conn, limit=5)['rows']
+    summary['statistics'] = get_statistics(conn, version)
+    summary['version'] = version
+    return summary
@@ -0,0 +1,110 @@
+"""Running per-subject statistics read from the trigger-maintained mark_histogram.
+
+Every write to marks (the single-mark form, the grid, bulk imports, or
+plain SQL) is applied to mark_histogram as a delta by SQLite triggers, so
+count, sum, sum of squares, min/max and grade-band counts per subject are
+available without scanning marks. The summarised numbers are kept in memory
+per data version; reading them costs O(subjects).
+
+Usage: python running_stats.py --verify [--repair]
+"""
+import argparse
+import math
+import sys
+
+from analytics import grade_for_mark
+from cache import VersionMemo
+from database import DB_PATH, GRADE_BANDS, connect, rebuild_mark_histogram
+
+def load_histogram(conn):
+    """{subject_id: {mark: count}} for every non-zero histogram cell"""
+    histogram = {}
+    for subject_id, mark, count in conn.execute(
+            'SELECT subject_id, marks, n FROM mark_histogram WHERE n > 0 ORDER BY subject_id, marks'):
+        histogram.setdefault(subject_id, {})[mark] = count
+    return histogram
+
+def summarize(histogram):
+    """Per-subject and overall count, sum, sum of squares, min/max, std and band counts"""
+    def aggregate(cells):
+        stats = {
+            'count': 0, 'sum': 0, 'sum_sq': 0, 'min': None, 'max': None,
+            'bands': {letter: 0 for _, letter in GRADE_BANDS},
+        }
+        for mark, count in cells:
+            stats['count'] += count
+            stats['sum'] += mark * count
+            stats['sum_sq'] += mark * mark * count
+            stats['min'] = mark if stats['min'] is None else min(stats['min'], mark)
+            stats['max'] = mark if stats['max'] is None else max(stats['max'], mark)
+            stats['bands'][grade_for_mark(mark)] += count
+        if stats['count']:
+            mean = stats['sum'] / stats['count']
+            stats['mean'] = mean
+            stats['std'] = math.sqrt(max(stats['sum_sq'] / stats['count'] - mean * mean, 0.0))
+        else:
+            stats['mean'] = stats['std'] = None
+        return stats
+
+    subjects = {subject_id: aggregate(cells.items()) for subject_id, cells in histogram.items()}
+    overall = aggregate((mark, count) for cells in histogram.values() for mark, count in cells.items())
+    return {'subjects': subjects, 'overall': overall}
+
+_latest = VersionMemo()
+
+def get_running_stats(conn, version=None):
+    """Summarised running stats, re-read from the database only when the version changes"""
+    return _latest.get(version, lambda: summarize(load_histogram(conn)))
+
+def verify_running_stats(conn):
+    """Compare mark_histogram with a full recount of marks.
+
+    Returns a list of (subject_id, mark, running_count, actual_count) for
+    every cell that disagrees; an empty list means the running stats are exact.
+    """
+    running = load_histogram(conn)
+    actual = {}
+    for subject_id, mark, count in conn.execute('''
+            SELECT subject_id, marks, COUNT(*) FROM marks
+            WHERE subject_id IS NOT NULL AND marks IS NOT NULL
+            GROUP BY subject_id, marks'''):
+        actual.setdefault(subject_id, {})[mark] = count
+
+    mismatches = []
+    for subject_id in sorted(set(running) | set(actual)):
+        cells_running = running.get(subject_id, {})
+        cells_actual = actual.get(subject_id, {})
+        for mark in sorted(set(cells_running) | set(cells_actual)):
+            have, want = cells_running.get(mark, 0), cells_actual.get(mark, 0)
+            if have != want:
+                mismatches.append((subject_id, mark, have, want))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the running statistics against a full recompute.')
+    parser.add_argument('--db', default=DB_PATH, help=f'database file (default {DB_PATH})')
+    parser.add_argument('--verify', action='store_true', help='recount marks and compare')
+    parser.add_argument('--repair', action='store_true', help='rebuild the histogram if it disagrees')
+    args = parser.parse_args()
+    if not args.verify:
+        parser.print_help()
+        return 1
+
+    conn = connect(args.db)
+    mismatches = verify_running_stats(conn)
+    if not mismatches:
+        print("✅ Running statistics match a full recompute")
+        return 0
+
+    print(f"⚠️ {len(mismatches)} histogram cell(s) disagree with the marks table:")
+    for subject_id, mark, have, want in mismatches[:50]:
+        print(f"   • subject {subject_id}, mark {mark}: running {have}, actual {want}")
+    if args.repair:
+        with conn:
+            rebuild_mark_histogram(conn.cursor())
+        print("🔧 Histogram rebuilt from marks")
+        return 0
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""The students list, one keyset page at a time or as one streamed dump.
+
+A page starts after the last key of the page before it ((name, id) or
+roll_no) and reads the next rows in index order: idx_students_name, the
+roll_no index, or their (semester, ...) versions when a semester is
+chosen. So page 1,000 costs the same as page 1, whatever the class size.
+Class sizes are counted once per data version rather than on every page.
+"""
+from cache import VersionMemo
+from paging import PAGE_SIZE, decode_cursor, encode_cursor, page_size
+
+COLUMNS = ('id', 'roll_no', 'name', 'semester')
+
+# Keyset condition and order of each sort; both match an index exactly
+SORTS = {
+    'name': ('(name, id) > (:name, :id)', 'name, id'),
+    'roll_no': ('roll_no > :roll_no', 'roll_no'),
+}
+
+# Cursor fields of each sort, in cursor order, with their types; the name
+# goes last because it may contain ':'
+CURSOR_FIELDS = {
+    'name': (('id', int), ('name', str)),
+    'roll_no': (('roll_no', str),),
+}
+
+def _keyset_params(sort, cursor):
+    """Keyset parameters from a cursor; the start of the list for None or ''"""
+    if not cursor:
+        return {'name': '', 'id': 0} if sort == 'name' else {'roll_no': ''}
+    fields = CURSOR_FIELDS[sort]
+    values = decode_cursor(cursor, [convert for _, convert in fields])
+    return {name: value for (name, _), value in zip(fields, values)}
+
+def _next_cursor(sort, row):
+    return encode_cursor(*(row[name] for name, _ in CURSOR_FIELDS[sort]))
+
+def _query(sort, semester, limit=None):
+    if sort not in SORTS:
+        raise ValueError(f"unknown sort '{sort}' (use {' or '.join(SORTS)})")
+    after, order = SORTS[sort]
+    where = f'semester = :semester AND {after}' if semester is not None else after
+    sql = f"SELECT {', '.join(COLUMNS)} FROM students WHERE {where} ORDER BY {order}"
+    return sql + ' LIMIT :limit' if limit else sql
+
+def students_page(conn, after=None, limit=PAGE_SIZE, sort='name', semester=None):
+    """One page of students ordered by name or roll number.
+
+    Returns {'rows': [...], 'next': cursor or None}. Pass 'next' back as
+    after= for the following page. Raises ValueError for a bad sort or cursor.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"unknown sort '{sort}' (use {' or '.join(SORTS)})")
+    limit = page_size(limit)
+    params = _keyset_params(sort, after)
+    params.update(semester=semester, limit=limit + 1)  # one extra row tells whether there is a next page
+    rows = [dict(zip(COLUMNS, row)) for row in conn.execute(_query(sort, semester, limit), params)]
+    next_cursor = _next_cursor(sort, rows[limit - 1]) if len(rows) > limit else None
+    return {'rows': rows[:limit], 'next': next_cursor}
+
+def iter_students(conn, sort='name', semester=None):
+    """Yield every student (of a semester) in list order, straight from the cursor"""
+    params = _keyset_params(sort, None)
+    params.update(semester=semester)
+    for row in conn.execute(_query(sort, semester), params):
+        yield dict(zip(COLUMNS, row))
+
+_sizes = VersionMemo()
+
+def count_class_sizes(conn):
+    """{'total': n, 'semesters': {semester: n}} in a single pass over idx_students_semester_name"""
+    semesters = dict(conn.execute('SELECT semester, COUNT(*) FROM students GROUP BY semester').fetchall())
+    return {'total': sum(semesters.values()), 'semesters': semesters}
+
+def class_sizes(conn, version):
+    """count_class_sizes(), recounted only when the data version changes"""
+    return _sizes.get(version, lambda: count_class_sizes(conn))
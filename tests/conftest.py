@@ -0,0 +1,34 @@
+"""Shared fixtures: a small generated database and scratch cache directories.
+
+Run the suite from the repository root with: python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Module-level paths are read at import time, so point them at scratch
+# directories before any app module is imported
+_scratch = tempfile.mkdtemp(prefix='bca_tests_')
+os.environ.setdefault('BCA_RESULTS_DB', os.path.join(_scratch, 'app.db'))
+os.environ.setdefault('BCA_PDF_CACHE', os.path.join(_scratch, 'pdf_cache'))
+os.environ.setdefault('BCA_JOB_DIR', os.path.join(_scratch, 'job_output'))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import connect  # noqa: E402
+from generate_data import generate_dataset  # noqa: E402
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A generated 30-student, 6-subject database"""
+    path = str(tmp_path / 'results.db')
+    generate_dataset(path, students=30, subjects=6, verbose=False)
+    return path
+
+@pytest.fixture
+def conn(db_path):
+    conn = connect(db_path)
+    yield conn
+    conn.close()
@@ -0,0 +1,51 @@
+import pytest
+
+import jobs
+
+@pytest.fixture
+def client(monkeypatch):
+    # Queued jobs stay queued: no workers start with the first request
+    monkeypatch.setattr(jobs, 'start_workers', lambda db_path=None: None)
+    from app import app
+    return app.test_client()
+
+def test_report_links_queue_one_job(client):
+    first = client.get('/download_booklet?semester=5')
+    again = client.get('/download_booklet?semester=5')
+
+    assert first.status_code == 303
+    assert first.headers['Location'].startswith('/jobs/')
+    assert again.headers['Location'] == first.headers['Location']
+
+def test_report_links_are_refused_when_the_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(jobs, 'MAX_QUEUED_JOBS', 0)
+
+    for url in ('/download_pdfs?ids=1,2', '/export/results?format=xlsx'):
+        response = client.get(url)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '60'
+
+def test_unknown_export_format_is_a_bad_request(client):
+    assert client.get('/export/results?format=docx').status_code == 400
+
+def test_per_student_responses_stay_private(client):
+    response = client.get('/view_result/1')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+def test_not_modified_repeats_the_pages_weak_etag(client):
+    page = client.get('/students', headers={'Accept-Encoding': 'gzip'})
+    etag = page.headers['ETag']
+    again = client.get('/students', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert etag.startswith('W/')
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert page.headers['Cache-Control'].startswith('public')
+
+def test_chart_not_modified_repeats_the_weak_etag(client):
+    chart = client.get('/charts/grade_distribution.svg', headers={'Accept-Encoding': 'gzip'})
+    again = client.get('/charts/grade_distribution.svg', headers={'If-None-Match': chart.headers['ETag']})
+
+    assert chart.headers['ETag'].startswith('W/')
+    assert again.status_code == 304
+    assert again.headers['ETag'] == chart.headers['ETag']
@@ -0,0 +1,34 @@
+import pymupdf
+
+from booklet import iter_booklet_cards, write_booklet
+from database import connect
+
+def test_commits_from_another_connection_between_pages(db_path, conn, tmp_path):
+    other = connect(db_path)
+    pages = 0
+
+    def on_progress(done, total, seconds):
+        nonlocal pages
+        pages = done
+        # Like a job's progress row or a mark edit landing mid-booklet
+        with other:
+            other.execute('UPDATE marks SET marks = marks WHERE student_id = ?', (done,))
+
+    path = str(tmp_path / 'booklet.pdf')
+    assert write_booklet(conn, path, on_progress=on_progress) == 30
+    other.close()
+
+    assert pages == 30
+    assert len(pymupdf.open(path)) == 30
+    published = conn.execute('SELECT COUNT(*) FROM result_publications').fetchone()[0]
+    assert published == 30
+
+def test_booklet_reuses_recorded_publication_dates(conn):
+    first = {card['student_id']: card['published_at'] for card in iter_booklet_cards(conn)}
+    with conn:
+        conn.execute("UPDATE result_publications SET published_at = '01-01-2025 00:00'")
+
+    again = {card['student_id']: card['published_at'] for card in iter_booklet_cards(conn)}
+
+    assert again.keys() == first.keys()
+    assert set(again.values()) == {'01-01-2025 00:00'}
@@ -0,0 +1,58 @@
+import sqlite3
+import threading
+import time
+
+import jobs
+
+def start_worker(db_path):
+    worker = threading.Thread(target=jobs._work, args=(db_path,), daemon=True)
+    worker.start()
+    return worker
+
+def wait_for(conn, job_id, timeout=30):
+    """The job's status once it has finished"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.job_status(conn, job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} still {job["status"]} after {timeout}s')
+
+def fail_once(monkeypatch, name, error):
+    """Make jobs.<name> raise error on its first call only"""
+    original = getattr(jobs, name)
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise error
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(jobs, name, flaky)
+    return calls
+
+def test_worker_survives_a_failing_claim(db_path, conn, monkeypatch):
+    monkeypatch.setattr(jobs, 'ERROR_PAUSE_SECONDS', 0)
+    calls = fail_once(monkeypatch, 'claim_next_job', sqlite3.OperationalError('database is locked'))
+    worker = start_worker(db_path)
+
+    job = wait_for(conn, jobs.submit(conn, 'charts')['id'])
+
+    assert len(calls) > 1
+    assert job['status'] == 'done'
+    assert worker.is_alive()
+
+def test_worker_fails_the_job_and_runs_the_next(db_path, conn, monkeypatch):
+    monkeypatch.setattr(jobs, 'ERROR_PAUSE_SECONDS', 0)
+    fail_once(monkeypatch, 'run_job', sqlite3.OperationalError('database is locked'))
+    worker = start_worker(db_path)
+
+    failed = wait_for(conn, jobs.submit(conn, 'charts')['id'])
+    done = wait_for(conn, jobs.submit(conn, 'charts')['id'])
+
+    assert failed['status'] == 'failed'
+    assert 'database is locked' in failed['error']
+    assert done['status'] == 'done'
+    assert worker.is_alive()
@@ -0,0 +1,53 @@
+from result_cards import card_cache, card_pdf, fetch_card
+
+OLD_DATE = '01-01-2025 00:00'
+
+def add_student(conn, roll_no, marks):
+    """Insert a student with {subject_id: marks}; returns the new id"""
+    with conn:
+        student_id = conn.execute("INSERT INTO students (roll_no, name, semester) VALUES (?, ?, 5)",
+                                  (roll_no, f'Student {roll_no}')).lastrowid
+        conn.executemany('INSERT INTO marks (student_id, subject_id, marks) VALUES (?, ?, ?)',
+                         [(student_id, subject_id, mark) for subject_id, mark in marks.items()])
+    return student_id
+
+def backdate(conn, student_id):
+    with conn:
+        conn.execute('UPDATE result_publications SET published_at = ? WHERE student_id = ?', (OLD_DATE, student_id))
+
+def test_new_student_does_not_redate_other_cards(conn):
+    before = fetch_card(conn, 1)
+    backdate(conn, 1)
+
+    add_student(conn, 'NEW001', {1: 99, 2: 99})
+    after = fetch_card(conn, 1)
+
+    assert after['rank']['out_of'] == before['rank']['out_of'] + 1
+    assert after['published_at'] == OLD_DATE
+    # The PDF shows the new class size, so it is a different file
+    assert after['key'] != before['key']
+
+def test_changed_marks_redate_only_that_card(conn):
+    fetch_card(conn, 1)
+    fetch_card(conn, 2)
+    backdate(conn, 1)
+    backdate(conn, 2)
+
+    with conn:
+        conn.execute('UPDATE marks SET marks = CASE WHEN marks > 50 THEN marks - 1 ELSE marks + 1 END '
+                     'WHERE student_id = 1 AND subject_id = 1')
+
+    assert fetch_card(conn, 1)['published_at'] != OLD_DATE
+    assert fetch_card(conn, 2)['published_at'] == OLD_DATE
+
+def test_rank_change_replaces_the_cached_pdf(conn):
+    first = fetch_card(conn, 1)
+    card_pdf(conn, first)
+    assert card_cache.get(first['key']) is not None
+
+    add_student(conn, 'NEW002', {1: 10})
+    second = fetch_card(conn, 1)
+    card_pdf(conn, second)
+
+    assert card_cache.get(second['key']) is not None
+    assert card_cache.get(first['key']) is None